@@ -2,44 +2,58 @@
 
 import sys
 
-import yaml
 import pygame
 from pygame.locals import *
 
 import level
 import profile
 import config
+import ghost
+import coursecache
+
+settings = config.display_settings()
+# Never run more than this much simulated time per frame, so a stall can't snowball
+MAX_FRAME_TIME = 0.25
 
-settings = config.DisplaySettings()
 pygame.init()
 pygame.font.init()
-screen = pygame.display.set_mode(settings.screen_resolution, pygame.FULLSCREEN)
+if settings.vsync:
+    screen = pygame.display.set_mode(settings.screen_resolution,
+                                     pygame.FULLSCREEN | pygame.SCALED, vsync=1)
+else:
+    screen = pygame.display.set_mode(settings.screen_resolution, pygame.FULLSCREEN)
 pygame.display.set_caption('ZeroGee')
 
 clock = pygame.time.Clock()
 
 player_profile = profile.Profile.load("default")
 course_name = sys.argv[1]
-with open(course_name + ".yaml") as course_file:
-    course_dict = yaml.load(course_file.read())
+course_dict = coursecache.load_course(course_name + ".yaml")
 with open(sys.argv[2]) as ship_file:
-    ship_dict = yaml.load(ship_file.read())
-best_splits = player_profile.fastest_run_splits(course_dict, ship_dict)
-level = level.Level(screen, course_dict, ship_dict, best_splits)
+    ship_dict = config.load_yaml(ship_file)
+best_run = player_profile.fastest_run(course_dict, ship_dict)
+best_splits = best_run.splits if best_run else None
+best_trace = player_profile.load_trace(best_run) if best_run else None
+ghost_trajectory = ghost.GhostTrajectory.from_trace(course_dict, best_run.ship_dict, best_trace) \
+    if best_trace else None
+level = level.Level(screen, course_dict, ship_dict, best_splits, ghost_trajectory)
 
 
 def check_for_termination():
     pressed_keys = pygame.key.get_pressed()
     return pressed_keys[pygame.K_ESCAPE]
 
+# Physics runs in fixed ticks of settings.tick_size; each frame runs as many ticks as the wall
+# clock calls for, then draws once, interpolated by the fraction of a tick left over.
+accumulator = 0
 while not check_for_termination():
     pygame.event.get()
-    
-    level.update()
-    level.draw()
-    
-    pygame.display.flip()
-    clock.tick(1 / settings.tick_size)
-
-player_profile.add_record(course_dict, ship_dict, level.active_splits)
+
+    accumulator = min(accumulator + clock.tick(settings.frame_rate) / 1000, MAX_FRAME_TIME)
+    while accumulator >= settings.tick_size:
+        level.update()
+        accumulator -= settings.tick_size
+    pygame.display.update(level.draw(accumulator / settings.tick_size))
+
+player_profile.add_record(course_dict, ship_dict, level.active_splits, level.input_trace)
 player_profile.save()
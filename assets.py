@@ -0,0 +1,34 @@
+"""Images shared by every sprite that draws them.
+
+Each PNG under images/ is decoded and converted to the display format once. The rotated and scaled
+variants that sprites draw are rendered on first use, keyed black with RLE acceleration, and kept
+in a bounded LRU cache, so that sprites showing the same picture share one surface.
+"""
+
+import functools
+
+import pygame
+
+IMAGE_DIRECTORY = "images/"
+COLORKEY = (0, 0, 0)
+MAX_VARIANTS = 8192
+
+
+@functools.lru_cache(maxsize=None)
+def source_image(name):
+    """Returns images/<name>.png, decoded and converted to the display format."""
+    return pygame.image.load(IMAGE_DIRECTORY + name + ".png").convert()
+
+
+@functools.lru_cache(maxsize=MAX_VARIANTS)
+def image(name, angle=0, scale=1.0):
+    """Returns the named image rotated counterclockwise by angle degrees and scaled by scale."""
+    variant = pygame.transform.rotozoom(source_image(name), angle, scale).convert()
+    variant.set_colorkey(COLORKEY, pygame.RLEACCEL)
+    return variant
+
+
+def quantize_angle(angle, steps):
+    """Returns the nearest of steps evenly spaced angles to angle, so that sprites at nearly the
+    same angle share an image."""
+    return round(angle * steps / 360) % steps * 360 / steps
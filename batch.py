@@ -0,0 +1,253 @@
+import math
+
+import numpy as np
+from pygame.math import Vector2
+
+import config
+import propulsion
+import waypoint
+import ship
+
+settings = config.display_settings()
+RADIANS_TO_DEGREES = 180 / math.pi
+
+ENGINE_SLOTS = ["main", "nose", "left_fore", "left_aft", "right_fore", "right_aft"]
+TANK_SLOTS = ["primary", "secondary"]
+CONTROL_FIELDS = ship.ControlState._fields
+ROTATIONAL_THROTTLE = CONTROL_FIELDS.index("rotational_throttle")
+
+# Controls that fire each engine, mirroring the _handle_input() method of each ship class. Engines
+# listed in THROTTLED_ENGINES also respond to the rotational throttle.
+ENGINE_CONTROLS = {
+    "Pegasus": {"main": ["forward"],
+                "left_fore": ["left"], "right_aft": ["left"],
+                "right_fore": ["right"], "left_aft": ["right"]},
+    "Manticore": {"main": ["forward"],
+                  "left_fore": ["left"], "right_aft": ["left"],
+                  "right_fore": ["right"], "left_aft": ["right"]},
+    "Dragon": {"main": ["forward"],
+               "left_fore": ["left", "left_slew"], "right_aft": ["left", "right_slew"],
+               "right_fore": ["right", "right_slew"], "left_aft": ["right", "left_slew"]},
+    "Phoenix": {"main": ["forward"], "nose": ["nose"],
+                "left_fore": ["left", "left_slew"], "right_aft": ["left", "right_slew"],
+                "right_fore": ["right", "right_slew"], "left_aft": ["right", "left_slew"]}
+}
+
+THROTTLED_ENGINES = {
+    "Pegasus": [],
+    "Manticore": ["left_fore", "left_aft", "right_fore", "right_aft"],
+    "Dragon": ["left_fore", "left_aft", "right_fore", "right_aft"],
+    "Phoenix": ["left_fore", "left_aft", "right_fore", "right_aft"]
+}
+
+
+# propulsion.EFFICIENCY_TABLE, padded so that a fill fraction of exactly 1 can interpolate, and
+# the slope from each entry to the next
+EFFICIENCY_TABLE = np.array(propulsion.EFFICIENCY_TABLE + propulsion.EFFICIENCY_TABLE[-1:])
+EFFICIENCY_SLOPES = np.diff(EFFICIENCY_TABLE, append=EFFICIENCY_TABLE[-1])
+
+
+def exact_efficiency(fill_fraction):
+    """Vectorized propulsion.FuelTank.exact_efficiency()."""
+    gamma = propulsion.FuelTank.GAMMA
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pressure = propulsion.FuelTank.FULL_PRESSURE * fill_fraction
+        pressure_term = (1 / pressure) ** ((gamma - 1) / gamma)
+        coefficient = np.sqrt(np.maximum(1 - pressure_term, 0))
+    coefficient = np.where((fill_fraction > 0) & (pressure_term < 1), coefficient, 0)
+    return coefficient / propulsion.FuelTank.pressure_coefficient(1)
+
+
+def efficiency(fill_fraction):
+    """Vectorized propulsion.efficiency_lookup() of fill fractions between 0 and 1."""
+    position = fill_fraction * (propulsion.EFFICIENCY_TABLE_SIZE - 1)
+    index = position.astype(np.intp)
+    position -= index
+    result = EFFICIENCY_SLOPES.take(index)
+    result *= position
+    result += EFFICIENCY_TABLE.take(index)
+    if fill_fraction.min() < propulsion.EFFICIENCY_EXACT_BELOW:
+        nearly_empty = fill_fraction < propulsion.EFFICIENCY_EXACT_BELOW
+        result[nearly_empty] = exact_efficiency(fill_fraction[nearly_empty])
+    return result
+
+
+def control_array(control_states):
+    """Packs a sequence of ship.ControlState into an (N, len(CONTROL_FIELDS)) boolean array."""
+    return np.array(control_states, dtype=bool).reshape(-1, len(CONTROL_FIELDS))
+
+
+class ShipBatch(object):
+    """Struct-of-arrays copy of N ships, advanced together one tick at a time.
+
+    Each ship is described by the scalar ship.Ship it was built from, and every array is indexed by
+    ship along its first axis. Engines and fuel tanks are laid out in the fixed ENGINE_SLOTS and
+    TANK_SLOTS; slots a ship class does not have are left inert. step() reproduces Ship.update()
+    for the whole batch to within floating point summation order.
+    """
+
+    def __init__(self, ships):
+        num_ships, num_engines, num_tanks = len(ships), len(ENGINE_SLOTS), len(TANK_SLOTS)
+
+        self.position = np.array([tuple(ship_.position) for ship_ in ships],
+                                 dtype=float).reshape(num_ships, 2)
+        self.velocity = np.array([tuple(ship_.velocity) for ship_ in ships],
+                                 dtype=float).reshape(num_ships, 2)
+        self.position_angular = np.array([ship_.position_angular for ship_ in ships], dtype=float)
+        self.velocity_angular = np.array([ship_.velocity_angular for ship_ in ships], dtype=float)
+        self.dry_mass = np.array([ship_.dry_mass for ship_ in ships], dtype=float)
+        self.rotational_inertia_factor = np.array([ship_.rotational_inertia_factor
+                                                   for ship_ in ships], dtype=float)
+
+        # Missing tanks are given a harmless capacity so that efficiency() stays finite
+        self.fuel_mass = np.zeros((num_ships, num_tanks))
+        self.max_fuel_mass = np.ones((num_ships, num_tanks))
+
+        self.engine_tank = np.zeros((num_ships, num_engines), dtype=int)
+        self.fuel_rate = np.zeros((num_ships, num_engines))
+        self.full_force = np.zeros((num_ships, num_engines))
+        self.full_torque = np.zeros((num_ships, num_engines))
+        self.throttle_ratio = np.ones((num_ships, num_engines))
+        self.engine_direction = np.zeros((num_ships, num_engines, 2))
+        self.engine_controls = np.zeros((num_ships, num_engines, len(CONTROL_FIELDS)), dtype=bool)
+        self.engine_throttled = np.zeros((num_ships, num_engines), dtype=bool)
+        self.power = np.zeros((num_ships, num_engines), dtype=int)
+        self.throttle_state = np.zeros((num_ships, num_engines), dtype=int)
+
+        for i, ship_ in enumerate(ships):
+            self._load_ship(i, ship_)
+
+    @classmethod
+    def from_dicts(cls, ship_dicts):
+        return cls([ship.ship_from_dict(dict_) for dict_ in ship_dicts])
+
+    def _load_ship(self, i, ship_):
+        tank_slots = {}
+        for j, name in enumerate(TANK_SLOTS):
+            tank = ship_.fuel_tanks.get(name)
+            if tank is None:
+                continue
+            tank_slots[id(tank)] = j
+            self.fuel_mass[i, j] = tank.fuel_mass
+            self.max_fuel_mass[i, j] = tank.max_fuel_mass
+
+        ship_class = type(ship_).__name__.replace("Sprite", "")
+        for j, name in enumerate(ENGINE_SLOTS):
+            engine = ship_.engines.get(name)
+            if engine is None:
+                continue
+            direction = Vector2(1, 0).rotate(-engine.direction)
+            self.engine_tank[i, j] = tank_slots[id(engine.fuel_tank)]
+            self.fuel_rate[i, j] = engine.fuel_rate
+            self.full_force[i, j] = engine.full_force
+            self.full_torque[i, j] = engine.full_torque
+            self.throttle_ratio[i, j] = engine.throttle_ratio
+            self.engine_direction[i, j] = direction.x, direction.y
+            self.power[i, j] = engine.power
+            self.throttle_state[i, j] = engine.throttle_state
+            for control in ENGINE_CONTROLS[ship_class].get(name, []):
+                self.engine_controls[i, j, CONTROL_FIELDS.index(control)] = True
+            self.engine_throttled[i, j] = name in THROTTLED_ENGINES[ship_class]
+
+    def __len__(self):
+        return len(self.position)
+
+    @property
+    def mass(self):
+        return self.dry_mass + self.fuel_mass.sum(axis=1)
+
+    @property
+    def speed(self):
+        return np.hypot(self.velocity[:, 0], self.velocity[:, 1])
+
+    def step(self, controls, external_acceleration=None):
+        """Advances every ship by one tick.
+
+        controls is an (N, len(CONTROL_FIELDS)) boolean array (see control_array()), or a single
+        ship.ControlState applied to every ship. external_acceleration is an optional (N, 2) array
+        of per-tick velocity changes, as returned by Course.acceleration().
+        """
+        controls = np.broadcast_to(control_array(controls), (len(self), len(CONTROL_FIELDS)))
+        self._update_engines(controls)
+
+        tank_efficiency = efficiency(self.fuel_mass / self.max_fuel_mass)
+        engine_efficiency = np.take_along_axis(tank_efficiency, self.engine_tank, axis=1)
+        thrust = self.thrust_factor * engine_efficiency
+        mass = self.mass
+
+        torque = (self.full_torque * thrust).sum(axis=1)
+        self.velocity_angular += (torque / (mass * self.rotational_inertia_factor)
+                                  * settings.tick_size * RADIANS_TO_DEGREES)
+        self.position_angular += self.velocity_angular * settings.tick_size
+
+        force = ((self.full_force * thrust)[:, :, np.newaxis]
+                 * self.engine_direction).sum(axis=1)
+        internal_acceleration = force / mass[:, np.newaxis] * settings.tick_size
+        angle = np.radians(-self.position_angular)
+        cos, sin = np.cos(angle), np.sin(angle)
+        self.velocity[:, 0] += cos * internal_acceleration[:, 0] - sin * internal_acceleration[:, 1]
+        self.velocity[:, 1] += sin * internal_acceleration[:, 0] + cos * internal_acceleration[:, 1]
+        if external_acceleration is not None:
+            self.velocity += external_acceleration
+        self.position += self.velocity * settings.tick_size
+
+    def _update_engines(self, controls):
+        tank_empty = self.fuel_mass <= 0
+        engine_empty = np.take_along_axis(tank_empty, self.engine_tank, axis=1)
+        key_on = (controls[:, np.newaxis, :] & self.engine_controls).any(axis=2)
+        engine_on = key_on & ~engine_empty
+        self.power = np.where(engine_on, np.minimum(self.power + 1, propulsion.Engine.MAX_POWER),
+                              np.maximum(self.power - 1, 0))
+
+        throttle_on = controls[:, ROTATIONAL_THROTTLE, np.newaxis] & self.engine_throttled
+        self.throttle_state = np.where(throttle_on, np.maximum(self.throttle_state - 1, 0),
+                                       np.minimum(self.throttle_state + 1,
+                                                  propulsion.Engine.THROTTLE_STEPS))
+
+        burn = self.thrust_factor * self.fuel_rate * settings.tick_size
+        for j in range(len(TANK_SLOTS)):
+            tank_burn = np.where(self.engine_tank == j, burn, 0).sum(axis=1)
+            self.fuel_mass[:, j] = np.maximum(self.fuel_mass[:, j] - tank_burn, 0)
+
+    @property
+    def thrust_factor(self):
+        throttle_factor = (self.throttle_ratio + (1 - self.throttle_ratio)
+                           * (self.throttle_state / propulsion.Engine.THROTTLE_STEPS))
+        return self.power / propulsion.Engine.MAX_POWER * throttle_factor
+
+
+class GateArrays(object):
+    """Struct-of-arrays copy of the gate frames of a course.GateSet (see waypoint.Gate), for
+    testing many ships against their current gates in one call."""
+
+    def __init__(self, gate_set):
+        gates = gate_set.gates
+        self.cos = np.array([gate.cos for gate in gates], dtype=float)
+        self.sin = np.array([gate.sin for gate in gates], dtype=float)
+        self.frame_x = np.array([gate.frame_x for gate in gates], dtype=float)
+        self.frame_y = np.array([gate.frame_y for gate in gates], dtype=float)
+        self.gate_sequence = np.array(gate_set.gate_sequence, dtype=int)
+
+    def frame_coordinates(self, positions, gate_indices):
+        """Returns the side and offset of each of positions, an (N, 2) array, relative to the gate
+        with the matching index in gate_indices."""
+        x, y = positions[:, 0], positions[:, 1]
+        cos, sin = self.cos[gate_indices], self.sin[gate_indices]
+        return (x * cos - y * sin - self.frame_x[gate_indices],
+                x * sin + y * cos - self.frame_y[gate_indices])
+
+    def crossings(self, previous_positions, positions, sequence_indices):
+        """Vectorized waypoint.Gate.update() for N ships, each moving from previous_positions to
+        positions and headed for the gate at sequence_indices in the gate sequence. Returns a
+        boolean array of the ships that passed through their gate, and the fraction of the tick
+        at which each did (NaN for the others)."""
+        in_sequence = sequence_indices < len(self.gate_sequence)
+        gate_indices = self.gate_sequence[np.where(in_sequence, sequence_indices, 0)]
+        last_side, last_offset = self.frame_coordinates(previous_positions, gate_indices)
+        side, offset = self.frame_coordinates(positions, gate_indices)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = last_side / (last_side - side)
+        crossing_offset = last_offset + fraction * (offset - last_offset)
+        passed = (in_sequence & (last_side * side < 0)
+                  & (np.abs(crossing_offset) < waypoint.Gate.MINIMUM_DISTANCE_FROM_CENTER))
+        return passed, np.where(passed, fraction, np.nan)
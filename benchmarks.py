@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for performance-sensitive parts of the game.
+
+Run a single benchmark or check by name, e.g. `python benchmarks.py efficiency`, or all of them
+with no arguments. Checks assert properties of the code that the benchmarks depend on, such as
+the absence of allocations in the physics step.
+"""
+
+import sys
+import random
+import timeit
+
+BENCHMARKS = {}
+CHECKS = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def check(func):
+    """Registers func as a check, which asserts something about the code instead of timing it."""
+    CHECKS[func.__name__] = func
+    return func
+
+
+def report(label, seconds, count):
+    print("{0:<40} {1:>10.3f} us".format(label, seconds / count * 1e6))
+
+
+@benchmark
+def efficiency():
+    import numpy as np
+
+    import batch
+    import propulsion
+
+    fill_fractions = [random.random() for _ in range(100000)]
+    exact = propulsion.FuelTank.exact_efficiency
+    lookup = propulsion.efficiency_lookup
+    report("FuelTank.exact_efficiency", timeit.timeit(
+        lambda: [exact(f) for f in fill_fractions], number=5), 5 * len(fill_fractions))
+    report("efficiency_lookup", timeit.timeit(
+        lambda: [lookup(f) for f in fill_fractions], number=5), 5 * len(fill_fractions))
+
+    # Two tanks per ship in batches of 100 and 10,000 ships, first with no tank nearly empty, which
+    # is where the table is used, and then mixed, with fill fractions over the whole range
+    table_fractions = [random.uniform(propulsion.EFFICIENCY_EXACT_BELOW, 1) for _ in range(20000)]
+    for num_ships, fractions, label in [(100, table_fractions, "100 ships"),
+                                        (10000, table_fractions, "10000 ships"),
+                                        (10000, fill_fractions, "10000 mixed")]:
+        fill_array = np.array(fractions[:2 * num_ships])
+        number = 2000000 // len(fill_array)
+        report("batch.exact_efficiency, {}".format(label), timeit.timeit(
+            lambda: batch.exact_efficiency(fill_array), number=number), number * len(fill_array))
+        report("batch.efficiency, {}".format(label), timeit.timeit(
+            lambda: batch.efficiency(fill_array), number=number), number * len(fill_array))
+
+    dense = np.linspace(0, 1, 1000001)
+    exact_values = batch.exact_efficiency(dense)
+    scalar_error = max(abs(lookup(f) - e) for f, e in zip(dense[::10], exact_values[::10]))
+    vector_error = np.abs(batch.efficiency(dense) - exact_values).max()
+    print("max error: scalar {0:.2e}, vectorized {1:.2e}".format(scalar_error, vector_error))
+
+
+@benchmark
+def ship_step():
+    """Times Ship.update() on a Phoenix firing its main engine and two thrusters."""
+    from pygame.math import Vector2
+
+    import ship
+
+    ship_dict = {"ship_class": "Phoenix", "primary_fuel_volume": 2000, "secondary_fuel_volume": 150,
+                 "primary_fuel_type": "Kerolox", "rotational_burn_rate": 1.0,
+                 "rotational_throttle_ratio": 0.2, "nose_burn_rate": 5.0}
+    ship_ = ship.ship_from_dict(ship_dict)
+    controls = ship.ControlState(forward=True, left=True, rotational_throttle=True)
+    external_acceleration = Vector2()
+    num_ticks = 10000
+    for _ in range(10):
+        ship_.update(external_acceleration, controls)
+    report("Ship.update", timeit.timeit(lambda: ship_.update(external_acceleration, controls),
+                                        number=num_ticks), num_ticks)
+
+
+def _count_allocations(func, modules):
+    """Calls func and returns the number of memory blocks that code in modules allocated and
+    still held at its next bytecode instruction, which includes every temporary object."""
+    filenames = {module.__file__ for module in modules}
+    allocations = 0
+    last_frame = last_blocks = None
+
+    def trace(frame, event, arg):
+        nonlocal allocations, last_frame, last_blocks
+        if frame.f_code.co_filename not in filenames:
+            return None
+        frame.f_trace_opcodes = True
+        if event == "opcode":
+            blocks = sys.getallocatedblocks()
+            # Blocks allocated by calls into other Python code, or by the frame object this
+            # tracing creates, show up across frames and are not counted
+            if frame is last_frame and blocks > last_blocks:
+                allocations += blocks - last_blocks
+            last_frame, last_blocks = frame, sys.getallocatedblocks()
+        else:
+            last_frame = None
+        return trace
+
+    sys.settrace(trace)
+    try:
+        func()
+    finally:
+        sys.settrace(None)
+    return allocations
+
+
+@check
+def ship_step_allocations():
+    """Checks that Ship.update() allocates nothing, so that its cost doesn't grow with temporary
+    objects built for each engine, on a Pegasus and a Phoenix firing every engine."""
+    import yaml
+    from pygame.math import Vector2
+
+    import ship
+    import propulsion
+
+    num_ticks = 200
+    for ship_class in ["pegasus", "phoenix"]:
+        with open("ships/sample_{}.yaml".format(ship_class)) as ship_file:
+            ship_ = ship.ship_from_dict(yaml.safe_load(ship_file))
+        controls = ship.ControlState(*[True] * len(ship.ControlState._fields))
+        external_acceleration = Vector2()
+        for _ in range(10):
+            ship_.update(external_acceleration, controls)
+
+        def step():
+            for _ in range(num_ticks):
+                ship_.update(external_acceleration, controls)
+
+        allocations = _count_allocations(step, [ship, propulsion])
+        print("{0} ({1} engines): {2} allocations per tick".format(
+            ship_class, len(ship_.engines), allocations / num_ticks))
+        assert allocations == 0, "Ship.update() allocates"
+    print("ok")
+
+
+@benchmark
+def batch_step():
+    """Steps a batch.ShipBatch of every ship in ships/ next to the scalar ships it was built
+    from, under random controls, and checks that the two stay within a tolerance."""
+    import glob
+
+    import numpy as np
+    import yaml
+    from pygame.math import Vector2
+
+    import batch
+    import ship
+
+    ship_dicts = []
+    for ship_filename in sorted(glob.glob("ships/*.yaml")):
+        with open(ship_filename) as ship_file:
+            ship_dicts.append(yaml.safe_load(ship_file))
+    ship_dicts *= 5
+    ships = [ship.ship_from_dict(dict_) for dict_ in ship_dicts]
+    ship_batch = batch.ShipBatch.from_dicts(ship_dicts)
+    external_acceleration = Vector2()
+    num_ticks = 3000
+    num_fields = len(ship.ControlState._fields)
+    control_states = [[ship.ControlState(*(random.random() < 0.5 for _ in range(num_fields)))
+                       for _ in ships] for _ in range(num_ticks)]
+
+    def step_scalar():
+        for tick_controls in control_states:
+            for ship_, control_state in zip(ships, tick_controls):
+                ship_.update(external_acceleration, control_state)
+
+    def step_batch():
+        for tick_controls in control_states:
+            ship_batch.step(tick_controls)
+
+    report("Ship.update (per ship)", timeit.timeit(step_scalar, number=1),
+           num_ticks * len(ships))
+    report("ShipBatch.step (per ship)", timeit.timeit(step_batch, number=1),
+           num_ticks * len(ships))
+
+    fuel_mass = [[ship_.fuel_tanks[name].fuel_mass if name in ship_.fuel_tanks else 0
+                  for name in batch.TANK_SLOTS] for ship_ in ships]
+    for label, scalar, vectorized in [
+            ("position", [tuple(ship_.position) for ship_ in ships], ship_batch.position),
+            ("velocity", [tuple(ship_.velocity) for ship_ in ships], ship_batch.velocity),
+            ("angle", [ship_.position_angular for ship_ in ships], ship_batch.position_angular),
+            ("fuel mass", fuel_mass, ship_batch.fuel_mass)]:
+        error = np.abs(np.array(scalar) - vectorized).max()
+        print("max {0} error after {1} ticks: {2:.2e}".format(label, num_ticks, error))
+        assert np.allclose(scalar, vectorized), label
+
+
+@benchmark
+def gravity_zones():
+    """Times GravityZoneSet.acceleration() on levels/uphill.yaml and on 5,000 random zones."""
+    import yaml
+    from pygame.math import Vector2
+
+    import course
+
+    with open("levels/uphill.yaml") as course_file:
+        uphill_zones = yaml.safe_load(course_file)["gravity_zones"]
+    random_zones = []
+    for _ in range(5000):
+        x, y = random.uniform(-5000, 5000), random.uniform(-5000, 5000)
+        random_zones.append({"bounding_box": [x, y, x + random.uniform(5, 80),
+                                              y + random.uniform(5, 80)],
+                             "strength": random.uniform(1, 20),
+                             "direction": random.uniform(0, 360)})
+
+    for label, zones, extent in [("uphill.yaml", uphill_zones, 200),
+                                 ("5,000 zones", random_zones, 5000)]:
+        zone_set = course.GravityZoneSet(None, zones)
+        positions = [Vector2(random.uniform(-extent, extent), random.uniform(-extent, extent))
+                     for _ in range(10000)]
+        report("acceleration, " + label, timeit.timeit(
+            lambda: [zone_set.acceleration(position) for position in positions], number=10),
+            10 * len(positions))
+
+
+@benchmark
+def proxies():
+    """Times a headless race tick on levels/proxy.yaml and on a course of 10,000 proxies."""
+    import yaml
+
+    import simulation
+
+    with open("levels/proxy.yaml") as course_file:
+        proxy_course = yaml.safe_load(course_file)
+    with open("ships/sample_pegasus.yaml") as ship_file:
+        ship_dict = yaml.safe_load(ship_file)
+    dense_course = {"proxies": [{"position": [10 * column, 10 * row]}
+                                for row in range(-50, 50) for column in range(100)],
+                    "finish_box": [-20, 0]}
+
+    num_ticks = 5000
+    for label, course_dict in [("proxy.yaml", proxy_course), ("10,000 proxies", dense_course)]:
+        simulation_ = simulation.Simulation(course_dict, ship_dict)
+        simulation_.ship.velocity.update(10, 3)
+        report("Simulation.step, " + label,
+               timeit.timeit(simulation_.step, number=num_ticks), num_ticks)
+        print("proxies activated: {}".format(simulation_.course.proxy_set.proxies_completed))
+
+
+@benchmark
+def course_load():
+    """Times loading and hashing a generated course of 5,000 proxies, 500 gates and 500 gravity
+    zones from YAML and from its compiled cache."""
+    import os
+    import tempfile
+
+    import yaml
+
+    import coursecache
+    import profile
+
+    course_dict = {
+        "gates": [{"position": [random.uniform(-5000, 5000), random.uniform(-5000, 5000)],
+                   "angle": random.uniform(0, 360)} for _ in range(500)],
+        "gate_sequence": list(range(500)),
+        "proxies": [{"position": [random.uniform(-5000, 5000), random.uniform(-5000, 5000)]}
+                    for _ in range(5000)],
+        "gravity_zones": [{"bounding_box": [x, y, x + 50, y + 50], "strength": 5, "direction": 90}
+                          for x, y in [(random.randint(-5000, 5000), random.randint(-5000, 5000))
+                                       for _ in range(500)]],
+        "finish_box": [0, 0]}
+
+    with tempfile.TemporaryDirectory() as directory:
+        course_path = os.path.join(directory, "generated.yaml")
+        with open(course_path, "w") as course_file:
+            yaml.safe_dump(course_dict, course_file)
+
+        def load_yaml():
+            with open(course_path) as course_file:
+                return profile.Profile.dict_hash(yaml.safe_load(course_file))
+
+        report("YAML load + dict_hash", timeit.timeit(load_yaml, number=3), 3)
+        coursecache.load_course(course_path)
+        report("compiled load + dict_hash", timeit.timeit(
+            lambda: profile.Profile.dict_hash(coursecache.load_course(course_path)), number=20), 20)
+        assert coursecache.load_course(course_path).digest == load_yaml()
+
+
+def _display():
+    """Opens the display for drawing benchmarks, headless if there is no screen."""
+    import os
+
+    import pygame
+
+    import config
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    return pygame.display.set_mode(config.display_settings().screen_resolution)
+
+
+@benchmark
+def ship_draw():
+    """Times drawing a ship hull from its rotation atlas against rotozooming it every frame."""
+    import pygame
+
+    import config
+    import ship
+
+    settings = config.display_settings()
+    screen = _display()
+    ship_dict = {"ship_class": "Phoenix", "primary_fuel_volume": 2000, "secondary_fuel_volume": 150,
+                 "primary_fuel_type": "Kerolox", "rotational_burn_rate": 1.0,
+                 "rotational_throttle_ratio": 0.2, "nose_burn_rate": 5.0}
+    report("first PhoenixSprite (builds the atlas)", timeit.timeit(
+        lambda: ship.ship_from_dict(ship_dict, screen), number=1), 1)
+    ship_ = ship.ship_from_dict(ship_dict, screen)
+    hull_image = ship_.load_image(ship_.IMAGE_FILENAME)
+    angles = [random.uniform(0, 360) for _ in range(1000)]
+    center = screen.get_rect().center
+
+    def draw_rotozoom():
+        for angle in angles:
+            image = pygame.transform.rotozoom(hull_image, angle, settings.scale_factor)
+            image.set_colorkey((0, 0, 0))
+            screen.blit(image, image.get_rect(center=center))
+
+    def draw_atlas():
+        for angle in angles:
+            image = ship.atlas_image(ship_.atlas, angle)
+            screen.blit(image, image.get_rect(center=center))
+
+    report("hull draw, rotozoom", timeit.timeit(draw_rotozoom, number=5), 5 * len(angles))
+    report("hull draw, atlas", timeit.timeit(draw_atlas, number=5), 5 * len(angles))
+
+
+@benchmark
+def flame_draw():
+    """Times building a ship's engine sprites and drawing its six firing thrusters from the shared
+    flame atlas, against rotozooming every flame every frame."""
+    import pygame
+
+    import assets
+    import config
+    import propulsion
+    import ship
+
+    settings = config.display_settings()
+
+    screen = _display()
+    ship_dict = {"ship_class": "Phoenix", "primary_fuel_volume": 2000, "secondary_fuel_volume": 150,
+                 "primary_fuel_type": "Kerolox", "rotational_burn_rate": 1.0,
+                 "rotational_throttle_ratio": 0.2, "nose_burn_rate": 5.0}
+    report("PhoenixSprite creation", timeit.timeit(
+        lambda: ship.ship_from_dict(ship_dict, screen), number=5), 5)
+    ship_ = ship.ship_from_dict(ship_dict, screen)
+    for engine in ship_.engines.values():
+        engine.update(True)
+    center = screen.get_rect().center
+    frames = [(random.uniform(0, 360), random.randrange(propulsion.Engine.NUM_STATES))
+              for _ in range(1000)]
+
+    def draw_flames():
+        for angle, state in frames:
+            for engine in ship_.engines.values():
+                engine.state = state
+                engine.draw(center, angle)
+
+    def draw_rotozoom():
+        for angle, state in frames:
+            for engine in ship_.engines.values():
+                frame = assets.source_image(propulsion.FLAME_IMAGE_NAMES[engine.MAX_POWER + state])
+                image = pygame.transform.rotozoom(frame, angle + engine.offset_angle,
+                                                  engine.scale_factor * settings.scale_factor)
+                image.set_colorkey((0, 0, 0))
+                screen.blit(image, image.get_rect(center=center + engine.offset.rotate(-angle)))
+
+    report("six flames, rotozoom", timeit.timeit(draw_rotozoom, number=1), len(frames))
+    draw_flames()
+    report("six flames, atlas", timeit.timeit(draw_flames, number=5), 5 * len(frames))
+
+
+@benchmark
+def course_sprites():
+    """Times building the sprites of a course of 1,000 gates and 1,000 proxies, and counts the
+    image memory they hold."""
+    import pygame
+
+    import assets
+    import course
+
+    screen = _display()
+    course_dict = {
+        "gates": [{"position": [random.uniform(-5000, 5000), random.uniform(-5000, 5000)],
+                   "angle": random.uniform(0, 360)} for _ in range(1000)],
+        "gate_sequence": list(range(1000)),
+        "proxies": [{"position": [random.uniform(-5000, 5000), random.uniform(-5000, 5000)]}
+                    for _ in range(1000)],
+        "finish_box": [0, 0]}
+    panel = screen.subsurface(pygame.Rect(0, 0, 1200, 800))
+    report("Course, cold image cache", timeit.timeit(
+        lambda: course.Course(panel, course_dict), number=1), 1)
+    report("Course, warm image cache", timeit.timeit(
+        lambda: course.Course(panel, course_dict), number=3), 3)
+
+    course_ = course.Course(panel, course_dict)
+    images = {id(sprite.image): sprite.image for sprite in course_.gates + course_.proxies}
+    image_bytes = sum(image.get_width() * image.get_height() * image.get_bytesize()
+                      for image in images.values())
+    print("{0} distinct images, {1:.1f} MB; {2}".format(len(images), image_bytes / 2 ** 20,
+                                                       assets.image.cache_info()))
+
+
+@benchmark
+def starfield_draw():
+    """Times drawing the configured starfield and one of 50,000 stars, against a set_at() call
+    per star."""
+    import pygame
+
+    import config
+    import starfield
+
+    screen = _display()
+    panel = screen.subsurface(pygame.Rect(0, 0, 1200, 800))
+    star_settings = config.read_config_section(section="starfield")
+    stars = starfield.Starfield(panel, star_settings)
+    colors = [panel.unmap_rgb(int(color)) for color in stars.colors]
+    rates = [parallax_rate for layer, parallax_rate in stars.layers
+             for _ in range(layer.stop - layer.start)]
+    cameras = [(random.uniform(-5000, 5000), random.uniform(-5000, 5000)) for _ in range(100)]
+
+    def draw_set_at():
+        for camera_x, camera_y in cameras:
+            for x, y, color, rate in zip(stars.x.tolist(), stars.y.tolist(), colors, rates):
+                panel.set_at((int((x - camera_x * rate) % stars.width),
+                              int((y - camera_y * rate) % stars.height)), color)
+
+    def draw_arrays(starfield_):
+        for camera_position in cameras:
+            starfield_.draw(camera_position)
+
+    num_stars = len(colors)
+    report("{} stars, set_at".format(num_stars), timeit.timeit(draw_set_at, number=1),
+           len(cameras))
+    report("{} stars, arrays".format(num_stars), timeit.timeit(
+        lambda: draw_arrays(stars), number=10), 10 * len(cameras))
+    dense_stars = starfield.Starfield(panel, dict(star_settings, num_stars=[30000, 15000, 5000]))
+    report("50000 stars, arrays", timeit.timeit(
+        lambda: draw_arrays(dense_stars), number=10), 10 * len(cameras))
+
+
+@benchmark
+def hud_draw():
+    """Times HUD.draw() with nothing changing and with only the race timer changing."""
+    import pygame
+
+    import hud
+
+    screen = _display()
+    hud_ = hud.HUD(screen.subsurface(pygame.Rect(0, 0, 480, 720)))
+    hud_.update({"current_time": 12.34, "last_split": 10.5, "split_delta": -0.5},
+                {"current_gate": 3, "num_gates": 7, "current_proxy": 2, "num_proxies": 5},
+                (4.56, 123.4))
+    hud_.draw()
+    report("HUD.draw, unchanged", timeit.timeit(hud_.draw, number=1000), 1000)
+
+    def draw_next_frame():
+        hud_.timing_status["current_time"] += 1 / 60
+        hud_.draw()
+
+    report("HUD.draw, timer changing", timeit.timeit(draw_next_frame, number=1000), 1000)
+
+
+@benchmark
+def level_draw():
+    """Times a frame of Level.draw() and pushing what it drew to the display, on
+    levels/tutorial.yaml before the start, with nothing changing, and while racing, against
+    redrawing and pushing the whole screen every frame. Racing frames include the tick."""
+    import pygame
+    import yaml
+
+    import level
+    import ship
+
+    screen = _display()
+    with open("levels/tutorial.yaml") as course_file:
+        course_dict = yaml.safe_load(course_file)
+    with open("ships/sample_pegasus.yaml") as ship_file:
+        ship_dict = yaml.safe_load(ship_file)
+    level_ = level.Level(screen, course_dict, ship_dict)
+    level_.simulation.control_source = lambda simulation_: ship.ControlState(forward=True)
+
+    def draw_frames(full_redraw):
+        num_pixels = 0
+        for _ in range(100):
+            level_.update()
+            if full_redraw:
+                for panel in level_.panels:
+                    panel.invalidate()
+                level_.draw(0.5)
+                dirty_rects = [screen.get_rect()]
+            else:
+                dirty_rects = level_.draw(0.5)
+            pygame.display.update(dirty_rects)
+            num_pixels += sum(rect.width * rect.height for rect in dirty_rects)
+        return num_pixels / 100 / (screen.get_width() * screen.get_height())
+
+    for status in [level.STATUS_READY, level.STATUS_GO]:
+        level_.status = status
+        for full_redraw in [True, False]:
+            fractions = []
+            seconds = timeit.timeit(lambda: fractions.append(draw_frames(full_redraw)), number=1)
+            report("{0}, {1} ({2:.0%} of screen pushed)".format(
+                "racing" if status is level.STATUS_GO else "ready",
+                "full" if full_redraw else "dirty rects", fractions[0]), seconds, 100)
+
+
+@check
+def level_draw_pixels():
+    """Checks that the screen built up from the rects Level.draw() returns matches redrawing the
+    whole screen, while racing levels/tutorial.yaml with 1 to 12 ticks between frames."""
+    import numpy as np
+    import pygame
+    import yaml
+
+    import level
+    import ship
+
+    screen = _display()
+    with open("levels/tutorial.yaml") as course_file:
+        course_dict = yaml.safe_load(course_file)
+    with open("ships/sample_pegasus.yaml") as ship_file:
+        ship_dict = yaml.safe_load(ship_file)
+    level_ = level.Level(screen, course_dict, ship_dict)
+    level_.simulation.control_source = lambda simulation_: ship.ControlState(
+        forward=True, left=simulation_.ticks % 50 < 20)
+    level_.status = level.STATUS_GO
+    # What the display would show, updated only where Level.draw() says the screen changed
+    displayed = screen.copy()
+    num_frames = 400
+    bad_frames = 0
+    for _ in range(num_frames):
+        for _ in range(random.randint(1, 12)):
+            level_.update()
+        alpha = random.random()
+        for rect in level_.draw(alpha):
+            displayed.blit(screen, rect, rect)
+        for panel in level_.panels:
+            panel.invalidate()
+        level_.draw(alpha)
+        if not np.array_equal(pygame.surfarray.pixels2d(displayed),
+                              pygame.surfarray.pixels2d(screen)):
+            bad_frames += 1
+            displayed.blit(screen, (0, 0))
+    print("{} of {} frames differ from a full redraw".format(bad_frames, num_frames))
+    assert bad_frames == 0, "Level.draw() leaves stale pixels"
+    print("ok")
+
+
+@benchmark
+def minimap_draw():
+    """Times MiniMap.draw() on courses of 100 and 10,000 proxies with a full trail, and
+    re-rendering the course layer when the map's scale changes."""
+    import pygame
+    import yaml
+
+    import course
+    import minimap
+    import ship
+
+    screen = _display()
+    panel = screen.subsurface(pygame.Rect(0, 0, 480, 360))
+    with open("ships/sample_pegasus.yaml") as ship_file:
+        ship_dict = yaml.safe_load(ship_file)
+    for num_proxies in [100, 10000]:
+        course_ = course.Course(None, {
+            "proxies": [{"position": [random.uniform(-5000, 5000), random.uniform(-5000, 5000)]}
+                        for _ in range(num_proxies)],
+            "finish_box": [0, 0]})
+        ship_ = ship.ship_from_dict(ship_dict)
+        minimap_ = minimap.MiniMap(panel, course_, ship_)
+        for _ in range(minimap_.TRAIL_LENGTH * minimap_.TRAIL_INTERVAL):
+            ship_.position.update(random.uniform(-5000, 5000), random.uniform(-5000, 5000))
+            minimap_.update()
+        minimap_.draw()
+        report("MiniMap.draw, {} proxies".format(num_proxies),
+               timeit.timeit(minimap_.draw, number=100), 100)
+        report("course layer, {} proxies".format(num_proxies),
+               timeit.timeit(minimap_._render_course_layer, number=10), 10)
+
+
+@benchmark
+def gravity_zone_draw():
+    """Times building and drawing a 2 km gravity zone that covers the whole view, and drawing it
+    with only a corner of the view dirty."""
+    import pygame
+
+    import hazard
+
+    screen = _display()
+    panel = screen.subsurface(pygame.Rect(0, 0, 1440, 1080))
+    zone_dict = {"bounding_box": [-1000, -1000, 1000, 1000], "strength": 15, "direction": 30}
+    report("GravityZoneSprite.from_dict",
+           timeit.timeit(lambda: hazard.GravityZoneSprite.from_dict(panel, zone_dict), number=10),
+           10)
+    zone = hazard.GravityZoneSprite.from_dict(panel, zone_dict)
+    camera_position = pygame.math.Vector2(123, 456)
+    report("GravityZoneSprite.draw, whole view",
+           timeit.timeit(lambda: zone.draw(camera_position), number=100), 100)
+    panel.set_clip(pygame.Rect(0, 0, 300, 200))
+    report("GravityZoneSprite.draw, clipped",
+           timeit.timeit(lambda: zone.draw(camera_position), number=100), 100)
+    panel.set_clip(None)
+
+
+STARTUP_SCRIPT = """
+import sys
+import time
+import runpy
+
+import pygame
+
+
+def first_frame(*args):
+    print(time.time())
+    raise SystemExit
+
+
+# Windowed, so that the screen is the configured size even without a display
+set_mode = pygame.display.set_mode
+pygame.display.set_mode = lambda size, flags=0, **kwargs: \
+    set_mode(size, flags & ~pygame.FULLSCREEN, **kwargs)
+pygame.display.update = first_frame
+sys.argv = ["ZeroGee.py", "levels/tutorial", "ships/sample_pegasus.yaml"]
+runpy.run_path("ZeroGee.py", run_name="__main__")
+"""
+
+
+@benchmark
+def startup():
+    """Times ZeroGee.py from launching the interpreter to pushing its first frame, the Ready
+    splash of levels/tutorial.yaml, headless if there is no screen, against launching Python and
+    importing pygame alone. The target is under 500 ms."""
+    import os
+    import time
+    import subprocess
+
+    env = dict(os.environ)
+    if not env.get("DISPLAY"):
+        env["SDL_VIDEODRIVER"] = "dummy"
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    # For comparison, the part of startup spent launching Python and importing pygame
+    baseline_script = "import time; import pygame; print(time.time())"
+    # The first launch warms the OS file cache and the compiled course
+    launches = 6
+    for label, script in [("python + import pygame", baseline_script),
+                          ("ZeroGee.py to first frame", STARTUP_SCRIPT)]:
+        total = 0
+        for launch in range(launches):
+            start = time.time()
+            output = subprocess.run([sys.executable, "-c", script], env=env, check=True,
+                                    stdout=subprocess.PIPE, universal_newlines=True).stdout
+            if launch:
+                total += float(output.split()[-1]) - start
+        report(label, total, launches - 1)
+
+
+if __name__ == "__main__":
+    tasks = dict(BENCHMARKS, **CHECKS)
+    for name in sys.argv[1:] or tasks:
+        print("== {} ==".format(name))
+        tasks[name]()
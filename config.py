@@ -1,23 +1,69 @@
+"""Game settings from config.yaml.
+
+The file is parsed once per process, on first use, with libyaml's C loader when PyYAML was built
+with it. display_settings() and controls() return objects shared by every module, whose
+attributes can't be reassigned.
+"""
+
+import types
+import functools
+
 import pygame
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+def load_yaml(stream):
+    """Parses a YAML document from stream, a string or an open file, like yaml.safe_load()."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def _freeze(value):
+    """Returns value with its dicts made read-only views and its lists made tuples."""
+    if isinstance(value, dict):
+        return types.MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def read_config(filename="config.yaml"):
+    """Returns the whole config file as a read-only mapping, parsing it on the first call."""
+    with open(filename, "rb") as file:
+        return _freeze(load_yaml(file))
+
 
 def read_config_section(section, filename="config.yaml"):
-    with open(filename, "r") as file:
-        config = yaml.load(file)
-    return config[section]
+    return read_config(filename)[section]
+
+
+class ReadOnlySettings(object):
+    """Settings whose attributes can be set once, in __init__, and never reassigned."""
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            raise AttributeError("setting {} is read-only".format(name))
+        super().__setattr__(name, value)
 
 
-class DisplaySettings(object):
+class DisplaySettings(ReadOnlySettings):
     def __init__(self, filename="config.yaml"):
         config = read_config_section("display", filename)
         self.screen_resolution = tuple(config["screen_resolution"])
         self.tick_size = config["tick_size"]
+        self.frame_rate = config.get("frame_rate", 0)
+        self.vsync = config.get("vsync", False)
+        self.rotation_steps = config.get("rotation_steps", 360)
         self.scale_factor = config["scale_factor"]
         self.meters_per_pixel = config["meters_per_pixel"] * self.scale_factor
 
 
-class Controls(object):
+class Controls(ReadOnlySettings):
     def __init__(self, filename="config.yaml"):
         config = read_config_section("controls", filename)
         self.forward = getattr(pygame, config["forward"])
@@ -27,3 +73,15 @@ class Controls(object):
         self.right_slew = getattr(pygame, config["right_slew"])
         self.rotational_throttle = getattr(pygame, config["rotational_throttle"])
         self.nose = getattr(pygame, config["nose"])
+
+
+@functools.lru_cache(maxsize=None)
+def display_settings(filename="config.yaml"):
+    """Returns the DisplaySettings shared by every module."""
+    return DisplaySettings(filename)
+
+
+@functools.lru_cache(maxsize=None)
+def controls(filename="config.yaml"):
+    """Returns the Controls shared by every module."""
+    return Controls(filename)
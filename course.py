@@ -1,10 +1,54 @@
-import yaml
+import math
+
 import pygame
 from pygame.math import Vector2
 
+import config
+import gfx
 import waypoint
 import hazard
 import finishbox
+import coursecache
+
+settings = config.display_settings()
+
+
+# Distance (m) by which coast_ticks() keeps a coasting ship clear of anything it could trigger
+COAST_MARGIN = 1.0
+
+
+def _rect_entry_time(rect, position, displacement):
+    """Returns the first time, in ticks, at which position + t * displacement comes within
+    COAST_MARGIN of rect, or math.inf if it never does."""
+    # collidepoint() truncates coordinates toward zero, so the rect is widened by a further meter
+    margin = COAST_MARGIN + 1
+    enter, leave = 0, math.inf
+    for low, high, start, step in ((rect.left, rect.right, position.x, displacement.x),
+                                   (rect.top, rect.bottom, position.y, displacement.y)):
+        low, high = low - margin, high + margin
+        if step == 0:
+            if not low <= start <= high:
+                return math.inf
+            continue
+        t_low, t_high = (low - start) / step, (high - start) / step
+        enter = max(enter, min(t_low, t_high))
+        leave = min(leave, max(t_low, t_high))
+    return enter if enter <= leave else math.inf
+
+
+def _circle_entry_time(center, radius, position, displacement):
+    """Returns the first time, in ticks, at which position + t * displacement comes within
+    COAST_MARGIN of the circle, or math.inf if it never does."""
+    offset = position - center
+    a = displacement.dot(displacement)
+    b = 2 * offset.dot(displacement)
+    c = offset.dot(offset) - (radius + COAST_MARGIN) ** 2
+    if c <= 0:
+        return 0
+    discriminant = b * b - 4 * a * c
+    if b >= 0 or discriminant < 0:
+        return math.inf
+    return (-b - math.sqrt(discriminant)) / (2 * a)
 
 
 class Course(object):
@@ -16,13 +60,15 @@ class Course(object):
         self.gate_set = GateSet(panel, *gate_spec)
         self.proxy_set = ProxySet(panel, proxy_spec)
         self.gravity_zone_set = GravityZoneSet(panel, gravity_zone_spec)
-        self.finish_box = finishbox.FinishBox(panel, dict_["finish_box"])
+        self.finish_box = finishbox.FinishBoxSprite(panel, dict_["finish_box"]) if panel \
+            else finishbox.FinishBox(dict_["finish_box"])
+        self.panel = panel
+        self.sprite_index = gfx.SpriteIndex(self.gates + self.proxies + self.gravity_zones
+                                            + [self.finish_box]) if panel else None
 
     @classmethod
-    def from_file(cls, course_path):
-        with open(course_path) as course_file:
-            course_dict = yaml.load(course_file.read())
-        return cls(course_dict)
+    def from_file(cls, course_path, panel=None):
+        return cls(panel, coursecache.load_course(course_path))
 
     @property
     def bounding_rect(self):
@@ -48,6 +94,18 @@ class Course(object):
             self.finish_box.locked = False
         self.finish_box.update(ship_position)
 
+    def coast_ticks(self, ship_position, displacement):
+        """Returns how many ticks a ship moving by displacement every tick can coast from
+        ship_position before it could pass the next gate, reach a proxy, or enter a gravity zone or
+        the unlocked finish box. Nothing on the course changes state during those ticks."""
+        ticks = min(self.gate_set.coast_ticks(ship_position, displacement),
+                    self.proxy_set.coast_ticks(ship_position, displacement),
+                    self.gravity_zone_set.coast_ticks(ship_position, displacement))
+        if not self.finish_box.locked:
+            ticks = min(ticks, _rect_entry_time(self.finish_box.location_rect, ship_position,
+                                                displacement))
+        return max(0, int(ticks) - 1) if ticks < math.inf else math.inf
+
     @property
     def status(self):
         return {"current_gate": self.gate_set.current_gate_index,
@@ -56,10 +114,12 @@ class Course(object):
                 "num_proxies": self.proxy_set.num_proxies}
     
     def draw(self, camera_position):
-        self.gate_set.draw(camera_position)
-        self.proxy_set.draw(camera_position)
-        self.gravity_zone_set.draw(camera_position)
-        self.finish_box.draw(camera_position)
+        """Draws the gates, proxies, gravity zones and finish box that are in view of the panel."""
+        view_width, view_height = (dimension * settings.meters_per_pixel
+                                   for dimension in self.panel.get_size())
+        left, top = camera_position
+        for sprite in self.sprite_index.visible(left, top, left + view_width, top + view_height):
+            sprite.draw(camera_position)
 
     @property
     def gates(self):
@@ -86,19 +146,51 @@ class Course(object):
 
 
 class ProxySet(object):
+    """The proxies of a course, hashed on a grid of square cells for activation checks.
+
+    Each inactive proxy is listed in every cell its activation circle overlaps, so a ship can only
+    activate proxies listed in its own cell. Proxies leave the grid once activated. Cells are as
+    wide as the largest activation radius, so a ship's cell lists few proxies it cannot reach.
+    """
+
+    MIN_CELL_SIZE = 4  # m
+
     def __init__(self, panel, proxies):
-        self.proxies = [waypoint.ProxySprite.from_dict(panel, proxy) for proxy in proxies]
+        self.proxies = [waypoint.ProxySprite.from_dict(panel, proxy) if panel
+                        else waypoint.Proxy.from_dict(proxy) for proxy in proxies]
         self.num_proxies = len(self.proxies)
         self.proxies_completed = 0
+        self.cell_size = max([self.MIN_CELL_SIZE] + [proxy.activation_radius
+                                                     for proxy in self.proxies])
+        self.cells = {}
+        for proxy in self.proxies:
+            for cell in self._cells_covered(proxy):
+                self.cells.setdefault(cell, []).append(proxy)
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def _cells_covered(self, proxy):
+        x, y, radius = proxy.position.x, proxy.position.y, proxy.activation_radius
+        min_x, min_y = self._cell(x - radius, y - radius)
+        max_x, max_y = self._cell(x + radius, y + radius)
+        return [(cell_x, cell_y) for cell_x in range(min_x, max_x + 1)
+                for cell_y in range(min_y, max_y + 1)]
 
     def update(self, ship_position):
-        for proxy in self.proxies:
-            if proxy.update(ship_position):
-                self.proxies_completed += 1
+        candidates = self.cells.get(self._cell(*ship_position))
+        if not candidates:
+            return
+        for proxy in [proxy for proxy in candidates if proxy.update(ship_position)]:
+            self.proxies_completed += 1
+            for cell in self._cells_covered(proxy):
+                self.cells[cell].remove(proxy)
 
-    def draw(self, camera_position):
-        for proxy in self.proxies:
-            proxy.draw(camera_position)
+    def coast_ticks(self, ship_position, displacement):
+        return min([_circle_entry_time(proxy.position, proxy.activation_radius, ship_position,
+                                       displacement)
+                    for proxy in self.proxies if proxy.status == waypoint.Proxy.STATUS_INACTIVE],
+                   default=math.inf)
 
     @property
     def is_complete(self):
@@ -107,10 +199,12 @@ class ProxySet(object):
 
 class GateSet(object):
     def __init__(self, panel, gates, gate_sequence):
-        self.gates = [waypoint.GateSprite.from_dict(panel, gate) for gate in gates]
+        self.gates = [waypoint.GateSprite.from_dict(panel, gate) if panel
+                      else waypoint.Gate.from_dict(gate) for gate in gates]
         self.gate_sequence = gate_sequence
         self.num_gates = len(self.gate_sequence)
         self.current_gate_index = 0
+        self.crossing_fraction = None
         if self.gates:
             self.current_gate = self.gate_sequence[self.current_gate_index]
             self.last_gate = self.current_gate
@@ -119,10 +213,15 @@ class GateSet(object):
     def update(self, ship_position):
         if not self.gates:
             return
-        updated_status = self.gates[self.current_gate].update(ship_position)
+        gate = self.gates[self.current_gate]
+        updated_status = gate.update(ship_position)
+        self.crossing_fraction = gate.crossing_fraction
         if updated_status:
             self._update_last_gate()
             self._update_current_gate()
+            if not self.is_complete:
+                # Start the next gate's motion segment from here, not from its last visit
+                self.gates[self.current_gate].update(ship_position)
             self._update_next_gate()
 
     def _update_last_gate(self):
@@ -140,9 +239,15 @@ class GateSet(object):
         if not self.is_complete:
             self.gates[self.current_gate].status = waypoint.Gate.STATUS_NEXT
 
-    def draw(self, camera_position):
-        for gate in self.gates:
-            gate.draw(camera_position)
+    def coast_ticks(self, ship_position, displacement):
+        if not self.gates or self.is_complete:
+            return math.inf
+        gate = self.gates[self.current_gate]
+        side = gate.frame_coordinates(ship_position)[0] - gate.frame_x
+        side_step = gate.frame_coordinates(displacement)[0]
+        if side * side_step >= 0:
+            return math.inf if side else 0
+        return max(0, (abs(side) - COAST_MARGIN) / abs(side_step))
 
     @property
     def is_complete(self):
@@ -150,15 +255,65 @@ class GateSet(object):
 
 
 class GravityZoneSet(object):
-    def __init__(self, panel, gravity_zones):
-        self.zones = [hazard.GravityZoneSprite.from_dict(panel, zone) for zone in gravity_zones]
+    """The gravity zones of a course, indexed on a sparse grid for acceleration lookups.
 
-    def draw(self, camera_position):
+    Each grid cell touched by a zone holds either the summed acceleration of its zones, if it lies
+    wholly inside every one of them, or the zones themselves, to be tested one by one. Cells are
+    aligned to whole meters, since Rect.collidepoint() truncates coordinates to integers.
+    """
+
+    CELL_SIZE = 16  # m
+    MAX_CELLS_PER_ZONE = 64
+
+    def __init__(self, panel, gravity_zones):
+        self.zones = [hazard.GravityZoneSprite.from_dict(panel, zone) if panel
+                      else hazard.GravityZone.from_dict(zone) for zone in gravity_zones]
+        self.cell_size = self.CELL_SIZE
+        while sum(len(self._cells_covered(zone.rect)) for zone in self.zones) \
+                > self.MAX_CELLS_PER_ZONE * len(self.zones):
+            self.cell_size *= 2
+        self.cells = self._build_cells()
+
+    def _cells_covered(self, rect):
+        size = self.cell_size
+        return [(cell_x, cell_y)
+                for cell_x in range(rect.left // size, (rect.right - 1) // size + 1)
+                for cell_y in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+
+    def _build_cells(self):
+        cells = {}
         for zone in self.zones:
-            zone.draw(camera_position)
+            for cell in self._cells_covered(zone.rect):
+                cells.setdefault(cell, []).append(zone)
+        for (cell_x, cell_y), zones in cells.items():
+            cell_rect = pygame.Rect(cell_x * self.cell_size, cell_y * self.cell_size,
+                                    self.cell_size, self.cell_size)
+            if all(zone.rect.contains(cell_rect) for zone in zones):
+                # Summed in zone order, exactly as a zone-by-zone lookup would
+                acceleration = Vector2()
+                for zone in zones:
+                    acceleration += zone.tick_acceleration
+                cells[cell_x, cell_y] = acceleration
+            else:
+                cells[cell_x, cell_y] = tuple(zones)
+        return cells
+
+    def coast_ticks(self, ship_position, displacement):
+        return min([_rect_entry_time(zone.rect, ship_position, displacement)
+                    for zone in self.zones], default=math.inf)
 
     def acceleration(self, ship_position):
-        acceleration = Vector2()
-        for zone in self.zones:
-            acceleration += zone.current_acceleration(ship_position)
-        return acceleration
+        """Returns the per-tick velocity change at ship_position. The result is shared, so it must
+        not be modified."""
+        x, y = int(ship_position[0]), int(ship_position[1])
+        cell = self.cells.get((x // self.cell_size, y // self.cell_size))
+        if cell is None:
+            return hazard.NO_ACCELERATION
+        if isinstance(cell, Vector2):
+            return cell
+        acceleration = None
+        for zone in cell:
+            if zone.rect.collidepoint(x, y):
+                acceleration = zone.tick_acceleration if acceleration is None \
+                    else acceleration + zone.tick_acceleration
+        return hazard.NO_ACCELERATION if acceleration is None else acceleration
@@ -0,0 +1,127 @@
+"""Compiled course files, so a course's YAML is only parsed when it changes.
+
+A course is compiled into a packed binary file in a __pycache__ directory beside its YAML source.
+The header records the source's modification time, size and SHA-256, along with the course hash
+used to key run records (see profile.Profile.dict_hash). If the source's modification time and
+size still match, the compiled file is used without reading the source at all; if only the
+modification time changed, the source is hashed and the compiled file reused if its contents are
+the same. Otherwise the source is parsed and compiled again.
+"""
+
+import os
+import math
+import struct
+import hashlib
+
+import config
+import profile
+
+MAGIC = b"ZGC1"
+# magic, source mtime (ns), source size, source SHA-256, course hash, then the number of gates,
+# gate sequence entries, proxies and gravity zones
+HEADER = struct.Struct("<4sqq32s32sIIII")
+FINISH_BOX = struct.Struct("<2d")
+GATE = struct.Struct("<3d")            # x, y, angle
+SEQUENCE_ENTRY = struct.Struct("<I")
+PROXY = struct.Struct("<3d")           # x, y, activation radius (NaN if not given)
+GRAVITY_ZONE = struct.Struct("<6d")    # min x, min y, max x, max y, strength, direction
+
+
+class CompiledCourse(dict):
+    """A course dict that knows the hash of the dict it was compiled from."""
+
+    def __init__(self, dict_, digest):
+        super().__init__(dict_)
+        self.digest = digest
+
+
+def cache_filename(course_path):
+    directory, filename = os.path.split(course_path)
+    return os.path.join(directory, "__pycache__", os.path.splitext(filename)[0] + ".zgc")
+
+
+def load_course(course_path):
+    """Returns the course dict of the YAML file at course_path, as a CompiledCourse."""
+    source_stat = os.stat(course_path)
+    cached = _read_cache(cache_filename(course_path))
+    if cached is not None:
+        header, data = cached
+        if (header[1], header[2]) == (source_stat.st_mtime_ns, source_stat.st_size):
+            return _unpack(header, data)
+
+    with open(course_path, "rb") as course_file:
+        source = course_file.read()
+    source_digest = hashlib.sha256(source).digest()
+    if cached is not None and cached[0][3] == source_digest:
+        course = _unpack(*cached)
+    else:
+        course_dict = config.load_yaml(source)
+        course = CompiledCourse(course_dict, profile.Profile.dict_hash(course_dict))
+    _write_cache(cache_filename(course_path), course, source_stat, source_digest)
+    return course
+
+
+def _read_cache(filename):
+    try:
+        with open(filename, "rb") as cache_file:
+            data = cache_file.read()
+    except OSError:
+        return None
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        return None
+    return HEADER.unpack_from(data), data
+
+
+def _write_cache(filename, course, source_stat, source_digest):
+    buffer = bytearray(HEADER.pack(MAGIC, source_stat.st_mtime_ns, source_stat.st_size,
+                                   source_digest, course.digest, len(course.get("gates", [])),
+                                   len(course.get("gate_sequence", [])),
+                                   len(course.get("proxies", [])),
+                                   len(course.get("gravity_zones", []))))
+    buffer += FINISH_BOX.pack(*course["finish_box"])
+    for gate in course.get("gates", []):
+        buffer += GATE.pack(*gate["position"], gate["angle"])
+    for gate_index in course.get("gate_sequence", []):
+        buffer += SEQUENCE_ENTRY.pack(gate_index)
+    for proxy in course.get("proxies", []):
+        radius = proxy.get("activation_radius")
+        buffer += PROXY.pack(*proxy["position"], math.nan if radius is None else radius)
+    for zone in course.get("gravity_zones", []):
+        buffer += GRAVITY_ZONE.pack(*zone["bounding_box"], zone["strength"], zone["direction"])
+    # A cache that cannot be written only costs a parse next time
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "wb") as cache_file:
+            cache_file.write(buffer)
+    except OSError:
+        pass
+
+
+def _unpack(header, data):
+    _, _, _, _, digest, num_gates, num_sequence_entries, num_proxies, num_zones = header
+    offset = HEADER.size
+    finish_box = list(FINISH_BOX.unpack_from(data, offset))
+    offset += FINISH_BOX.size
+
+    gates = [{"position": [x, y], "angle": angle} for x, y, angle in
+             GATE.iter_unpack(data[offset:offset + num_gates * GATE.size])]
+    offset += num_gates * GATE.size
+    gate_sequence = [entry for entry, in SEQUENCE_ENTRY.iter_unpack(
+        data[offset:offset + num_sequence_entries * SEQUENCE_ENTRY.size])]
+    offset += num_sequence_entries * SEQUENCE_ENTRY.size
+
+    proxies = []
+    for x, y, radius in PROXY.iter_unpack(data[offset:offset + num_proxies * PROXY.size]):
+        proxy = {"position": [x, y]}
+        if not math.isnan(radius):
+            proxy["activation_radius"] = radius
+        proxies.append(proxy)
+    offset += num_proxies * PROXY.size
+
+    gravity_zones = [{"bounding_box": [min_x, min_y, max_x, max_y], "strength": strength,
+                      "direction": direction}
+                     for min_x, min_y, max_x, max_y, strength, direction in
+                     GRAVITY_ZONE.iter_unpack(data[offset:offset + num_zones * GRAVITY_ZONE.size])]
+
+    return CompiledCourse({"gates": gates, "gate_sequence": gate_sequence, "proxies": proxies,
+                           "gravity_zones": gravity_zones, "finish_box": finish_box}, digest)
@@ -1,6 +1,6 @@
 import config
 
-settings = config.DisplaySettings()
+settings = config.display_settings()
 
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -26,6 +26,53 @@ class LevelSprite(Sprite):
         self.blit_rect = None
         self.position = None
 
+    @property
+    def world_rect(self):
+        """Returns the (left, top, right, bottom) bounds of the sprite in meters."""
+        half_width = self.blit_rect.width * settings.meters_per_pixel / 2
+        half_height = self.blit_rect.height * settings.meters_per_pixel / 2
+        x, y = self.position[0], self.position[1]
+        return x - half_width, y - half_height, x + half_width, y + half_height
+
     def draw(self, camera_position):
+        """Blits the sprite if any of it falls on the panel, and returns whether it did."""
         self.blit_rect.center = (self.position - camera_position) / settings.meters_per_pixel
+        if not self.blit_rect.colliderect(self.panel_rect):
+            return False
         self.panel.blit(self.image, self.blit_rect)
+        return True
+
+
+class SpriteIndex(object):
+    """Uniform grid over the world bounds of LevelSprites that never move, so that a frame only
+    draws the ones in view. num_drawn and num_culled count the sprites in and out of the last
+    view queried."""
+
+    CELL_SIZE = 50  # m
+
+    def __init__(self, sprites):
+        self.sprites = list(sprites)
+        self.rects = [sprite.world_rect for sprite in self.sprites]
+        self.cells = {}
+        for order, rect in enumerate(self.rects):
+            for cell in self._cells(*rect):
+                self.cells.setdefault(cell, []).append(order)
+        self.num_drawn = 0
+        self.num_culled = 0
+
+    def _cells(self, left, top, right, bottom):
+        size = self.CELL_SIZE
+        return [(cell_x, cell_y) for cell_x in range(int(left // size), int(right // size) + 1)
+                for cell_y in range(int(top // size), int(bottom // size) + 1)]
+
+    def visible(self, left, top, right, bottom):
+        """Returns the sprites that overlap the given world bounds, in the order they were given."""
+        candidates = set()
+        for cell in self._cells(left, top, right, bottom):
+            candidates.update(self.cells.get(cell, ()))
+        visible = [self.sprites[order] for order in sorted(candidates)
+                   if self.rects[order][0] < right and left < self.rects[order][2]
+                   and self.rects[order][1] < bottom and top < self.rects[order][3]]
+        self.num_drawn = len(visible)
+        self.num_culled = len(self.sprites) - self.num_drawn
+        return visible
@@ -0,0 +1,127 @@
+import array
+
+from pygame.math import Vector2
+
+import gfx
+import ship
+import simulation
+
+
+class GhostTrajectory(object):
+    """Per-tick position and angle of a recorded run, stored compactly for playback.
+
+    States are quantized to POSITION_RESOLUTION and ANGLE_RESOLUTION. Every KEYFRAME_INTERVAL
+    ticks the absolute state is stored; in between, only 16-bit deltas from the previous tick are
+    kept. Reading the state of any tick therefore touches at most one keyframe and
+    KEYFRAME_INTERVAL deltas, and reading consecutive ticks costs a single delta each.
+    """
+
+    KEYFRAME_INTERVAL = 50
+    POSITION_RESOLUTION = 0.01  # m
+    ANGLE_RESOLUTION = 0.02     # degrees
+    DELTA_LIMIT = 32767
+
+    def __init__(self):
+        self.keyframes = array.array("q")
+        self.deltas = array.array("h")
+        self.num_ticks = 0
+        self._last_state = None
+        self._cursor_tick = None
+        self._cursor_state = None
+
+    @classmethod
+    def from_trace(cls, course_dict, ship_dict, input_trace):
+        """Re-simulates a recorded run once, outside the frame loop, and keeps its trajectory."""
+        trajectory = cls()
+        simulation_ = simulation.Simulation(course_dict, ship_dict,
+                                            simulation.TraceControls(input_trace))
+        trajectory.append(simulation_.ship.position, simulation_.ship.position_angular)
+        while not simulation_.finished and simulation_.ticks < len(input_trace):
+            simulation_.step()
+            trajectory.append(simulation_.ship.position, simulation_.ship.position_angular)
+        return trajectory
+
+    def __len__(self):
+        return self.num_ticks
+
+    def _quantize(self, position, position_angular):
+        return [int(round(position[0] / self.POSITION_RESOLUTION)),
+                int(round(position[1] / self.POSITION_RESOLUTION)),
+                int(round(position_angular / self.ANGLE_RESOLUTION))]
+
+    def append(self, position, position_angular):
+        state = self._quantize(position, position_angular)
+        if self.num_ticks % self.KEYFRAME_INTERVAL == 0:
+            self.keyframes.extend(state)
+            deltas = [0, 0, 0]
+        else:
+            # Deltas are taken against the reconstructed state, so clamping never accumulates
+            deltas = [max(-self.DELTA_LIMIT, min(self.DELTA_LIMIT, new - old))
+                      for new, old in zip(state, self._last_state)]
+            state = [old + delta for old, delta in zip(self._last_state, deltas)]
+        self.deltas.extend(deltas)
+        self._last_state = state
+        self.num_ticks += 1
+
+    def _seek(self, tick):
+        if self._cursor_tick is not None and self._cursor_tick <= tick \
+                and tick // self.KEYFRAME_INTERVAL == self._cursor_tick // self.KEYFRAME_INTERVAL:
+            start, state = self._cursor_tick, self._cursor_state
+        else:
+            start = tick - tick % self.KEYFRAME_INTERVAL
+            keyframe = 3 * (start // self.KEYFRAME_INTERVAL)
+            state = list(self.keyframes[keyframe:keyframe + 3])
+        for t in range(start + 1, tick + 1):
+            state[0] += self.deltas[3 * t]
+            state[1] += self.deltas[3 * t + 1]
+            state[2] += self.deltas[3 * t + 2]
+        self._cursor_tick, self._cursor_state = tick, state
+        return state
+
+    def state(self, tick):
+        """Returns (position, position_angular) at tick, holding the last state after the end."""
+        state = self._seek(max(0, min(tick, self.num_ticks - 1)))
+        position = Vector2(state[0], state[1]) * self.POSITION_RESOLUTION
+        return position, state[2] * self.ANGLE_RESOLUTION
+
+
+class GhostSprite(gfx.LevelSprite):
+    ALPHA = 90
+
+    def __init__(self, panel, ship_class, trajectory):
+        super().__init__(panel)
+        sprite_class = getattr(ship, ship_class + "Sprite")
+        self.atlas = sprite_class.rotation_atlas(sprite_class.IMAGE_FILENAME, self.ALPHA)
+        self.trajectory = trajectory
+        self.position = Vector2()
+        self.position_angular = 0
+        self.tick = None
+        self.pose = self.previous_pose = None
+        self.image_ = None
+        self.blit_rect = None
+
+    @property
+    def image(self):
+        return self.image_
+
+    def _update_pose(self, tick):
+        if tick == self.tick:
+            return
+        if self.tick is not None and tick == self.tick + 1:
+            self.previous_pose = self.pose
+        else:
+            self.previous_pose = self.trajectory.state(tick - 1)
+        self.pose = self.trajectory.state(tick)
+        self.tick = tick
+
+    def draw(self, camera_position, tick, alpha=1.0):
+        if not len(self.trajectory):
+            return
+        self._update_pose(tick)
+        (previous_position, previous_angular), (position, position_angular) = \
+            self.previous_pose, self.pose
+        self.position = previous_position.lerp(position, alpha)
+        self.position_angular = previous_angular + (position_angular - previous_angular) * alpha
+        self.image_ = ship.atlas_image(self.atlas, self.position_angular)
+        self.blit_rect = self.image_.get_rect()
+        super().draw(camera_position)
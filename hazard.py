@@ -1,10 +1,15 @@
+import math
+
 import pygame
 from pygame.math import Vector2
 
 import config
 import gfx
 
-settings = config.DisplaySettings()
+settings = config.display_settings()
+
+# Returned, never modified, wherever no gravity zone acts on a ship
+NO_ACCELERATION = Vector2()
 
 
 class GravityZone(object):
@@ -15,6 +20,7 @@ class GravityZone(object):
         self.rect = pygame.Rect(min_x, min_y, *size)
         self.acceleration = Vector2()
         self.acceleration.from_polar((strength, direction))
+        self.tick_acceleration = self.acceleration * settings.tick_size
 
     @classmethod
     def from_dict(cls, dict_):
@@ -22,60 +28,115 @@ class GravityZone(object):
 
     def current_acceleration(self, ship_position):
         if self.rect.collidepoint(*ship_position):
-            return self.acceleration * settings.tick_size
+            return self.tick_acceleration
         else:
-            return Vector2()
+            return NO_ACCELERATION
 
 
 class GravityZoneSprite(GravityZone, gfx.LevelSprite):
+    """A gravity zone drawn as a translucent hatch pattern, tiled over just the part of it that is
+    in view, so that neither its memory nor its drawing time depends on its size."""
+
     BACKGROUND_COLOR = (50, 120, 50)
     BORDER_COLOR = (50, 250, 50)
     HATCH_COLOR = (50, 20, 50)
     HATCH_WIDTH = 8
     HATCH_SPACING = 50
     HATCH_SCALE = 3
+    ALPHA = 100
+    TILE_HATCHES = 8  # hatches along each side of a tile
+    # Hatch tiles keyed by acceleration, and border strips keyed by panel size
+    hatch_tiles = {}
+    border_strips = {}
 
     def __init__(self, panel, *args, **kwargs):
         super().__init__(*args, **kwargs, panel=panel)
         self.position = self.rect.center
-        self.image_cache = self._render_image()
-        self.blit_rect = self.image.get_rect()
+        self.tile = self.hatch_tile(self.acceleration)
+        width, height = Vector2(self.rect.size) / settings.meters_per_pixel
+        self.blit_rect = pygame.Rect(0, 0, int(width), int(height))
 
     @property
     def image(self):
-        return self.image_cache
+        return self.tile
 
     @classmethod
     def from_dict(cls, panel, dict_):
         return cls(panel=panel, bounding_box=dict_["bounding_box"], strength=dict_["strength"],
                    direction=dict_["direction"])
 
-    def _render_image(self):
-        image_size = Vector2(self.rect.size) / settings.meters_per_pixel
-        image = pygame.Surface(image_size)
-        image.fill(self.BACKGROUND_COLOR)
-        pygame.draw.rect(image, self.BORDER_COLOR, image.get_rect(), 1)
-        image = self._render_hatches(image)
-        image.set_alpha(100)
-        return image
-
-    def _render_hatches(self, image):
-        x = self.HATCH_SPACING / 2
-        while x < image.get_rect().width:
-            y = self.HATCH_SPACING / 2
-            while y < image.get_rect().height:
-                image = self._render_hatch(image, x, y)
-                y += self.HATCH_SPACING
-            x += self.HATCH_SPACING
-        return image
-
-    def _render_hatch(self, image, x, y):
+    @classmethod
+    def hatch_tile(cls, acceleration):
+        """Returns a square of the hatch pattern for zones with the given acceleration, which
+        repeats seamlessly, rendering it on first use."""
+        key = tuple(acceleration)
+        if key not in GravityZoneSprite.hatch_tiles:
+            tile_size = cls.HATCH_SPACING * cls.TILE_HATCHES
+            tile = pygame.Surface((tile_size, tile_size)).convert()
+            tile.fill(cls.BACKGROUND_COLOR)
+            # Hatches long enough to cross into a neighboring tile are drawn there too
+            direction = acceleration * cls.HATCH_SCALE
+            reach = math.ceil((direction.length() + cls.HATCH_WIDTH) / cls.HATCH_SPACING)
+            for column in range(-reach, cls.TILE_HATCHES + reach):
+                for row in range(-reach, cls.TILE_HATCHES + reach):
+                    cls._render_hatch(tile, (column + 0.5) * cls.HATCH_SPACING,
+                                      (row + 0.5) * cls.HATCH_SPACING, direction)
+            tile.set_alpha(cls.ALPHA)
+            GravityZoneSprite.hatch_tiles[key] = tile
+        return GravityZoneSprite.hatch_tiles[key]
+
+    @classmethod
+    def _render_hatch(cls, image, x, y, direction):
         position = Vector2(x, y)
-        direction = self.acceleration * self.HATCH_SCALE
         baseline = direction.rotate(90)
-        baseline.scale_to_length(self.HATCH_WIDTH)
+        baseline.scale_to_length(cls.HATCH_WIDTH)
         tip = position + direction
         left_base, right_base = position + baseline, position - baseline
-        pygame.draw.aaline(image, self.HATCH_COLOR, left_base, tip)
-        pygame.draw.aaline(image, self.HATCH_COLOR, right_base, tip)
-        return image
+        pygame.draw.aaline(image, cls.HATCH_COLOR, left_base, tip)
+        pygame.draw.aaline(image, cls.HATCH_COLOR, right_base, tip)
+
+    def draw(self, camera_position):
+        """Blends hatch tiles over the zone's interior and strips of color over its border, within
+        the panel's clip rect, and returns whether any of the zone was in view."""
+        self.blit_rect.center = (self.position - camera_position) / settings.meters_per_pixel
+        clip = self.panel.get_clip()
+        if not self.blit_rect.colliderect(clip):
+            return False
+
+        # Tiles are aligned with the zone's top left corner
+        interior = self.blit_rect.inflate(-2, -2).clip(clip)
+        tile_size = self.tile.get_width()
+        left = interior.left - (interior.left - self.blit_rect.left) % tile_size
+        top = interior.top - (interior.top - self.blit_rect.top) % tile_size
+        for x in range(left, interior.right, tile_size):
+            for y in range(top, interior.bottom, tile_size):
+                area = pygame.Rect(x, y, tile_size, tile_size).clip(interior)
+                self.panel.blit(self.tile, area, area.move(-x, -y))
+
+        horizontal_strip, vertical_strip = self._border_strips()
+        rect = self.blit_rect
+        edges = [(horizontal_strip, pygame.Rect(rect.left, rect.top, rect.width, 1))]
+        if rect.height > 1:
+            edges.append((horizontal_strip, pygame.Rect(rect.left, rect.bottom - 1, rect.width, 1)))
+        if rect.height > 2:
+            edges.append((vertical_strip, pygame.Rect(rect.left, rect.top + 1, 1, rect.height - 2)))
+            if rect.width > 1:
+                edges.append((vertical_strip,
+                              pygame.Rect(rect.right - 1, rect.top + 1, 1, rect.height - 2)))
+        for strip, edge in edges:
+            edge = edge.clip(clip)
+            if edge:
+                self.panel.blit(strip, edge, pygame.Rect((0, 0), edge.size))
+        return True
+
+    def _border_strips(self):
+        """Returns a row and a column of border color as long as the panel is wide and high."""
+        size = self.panel.get_size()
+        if size not in GravityZoneSprite.border_strips:
+            strips = (pygame.Surface((size[0], 1)).convert(),
+                      pygame.Surface((1, size[1])).convert())
+            for strip in strips:
+                strip.fill(self.BORDER_COLOR)
+                strip.set_alpha(self.ALPHA)
+            GravityZoneSprite.border_strips[size] = strips
+        return GravityZoneSprite.border_strips[size]
@@ -19,6 +19,9 @@ class HUD(object):
         self.panel = panel
         self.fuel_mass = None
         self.primary_font = pygame.freetype.Font('fonts/AlphaSmart3000.ttf')
+        self.labels = self._render_labels()
+        self.drawn_values = None
+        self.drawn_rects = None
     
     def update(self, timing_status, course_status, ship_status):
         self.timing_status = timing_status
@@ -26,13 +29,56 @@ class HUD(object):
         self.speed, self.fuel_mass = ship_status
         self.fuel_mass = max(self.fuel_mass, 0)
     
+    def _render_labels(self):
+        """Returns a layer holding the labels that never change, keyed black so that it can be
+        blitted over the panel's border."""
+        labels = pygame.Surface(self.panel.get_size()).convert()
+        for label, location, size, justify in [
+                ("Waypoints:", (0.50, self.WAYPOINT_VERTICAL_OFFSET + .04), 1.5, text.CENTER),
+                ("Gates:", (0.25, self.WAYPOINT_VERTICAL_OFFSET + 0.22), 0.8, text.CENTER),
+                ("Proxies:", (0.75, self.WAYPOINT_VERTICAL_OFFSET + 0.22), 0.8, text.CENTER),
+                ("Velocity:", (0.50, self.SPEED_VERTICAL_OFFSET + 0.03), 1.2, text.CENTER),
+                ("m/s", (0.75, self.SPEED_VERTICAL_OFFSET + 0.16), 1.5, text.BOTTOM),
+                ("Fuel Left:", (0.50, self.FUEL_VERTICAL_OFFSET + 0.03), 1.2, text.CENTER),
+                ("kg", (0.72, self.FUEL_VERTICAL_OFFSET + 0.16), 1.5, text.BOTTOM),
+                ("Split:", (0.45, self.TIME_VERTICAL_OFFSET + 0.17), 1.0, text.CENTER)]:
+            text.render_text(labels, self.primary_font, label, location, foreground=text.BLUE,
+                             size=size, justify=justify)
+        labels.set_colorkey(text.BLACK, pygame.RLEACCEL)
+        return labels
+
     def draw(self):
-        self._draw_waypoint()
-        self._draw_time()
-        self._draw_speed()
-        self._draw_fuel()
+        """Draws the labels from their pre-rendered layer and the values on top. Values are drawn
+        through text.render_text()'s cache, so only the ones that changed are rasterized."""
+        self.panel.blit(self.labels, (0, 0))
+        for value_text, location, size, justify, foreground in self.values():
+            text.render_text(self.panel, self.primary_font, value_text, location,
+                             foreground=foreground, size=size, justify=justify)
+
+    def dirty_rects(self):
+        """Returns the rects of the panel whose values have changed since the last call, covering
+        both the old and the new text."""
+        values = self.values()
+        rects = [text.text_rect(self.panel, self.primary_font, value_text, location,
+                                foreground=foreground, size=size, justify=justify)
+                 for value_text, location, size, justify, foreground in values]
+        if self.drawn_values is None:
+            dirty_rects = [self.panel.get_rect()]
+        else:
+            dirty_rects = []
+            for value, drawn_value, rect, drawn_rect \
+                    in zip(values, self.drawn_values, rects, self.drawn_rects):
+                if value != drawn_value:
+                    dirty_rects += [drawn_rect, rect]
+        self.drawn_values, self.drawn_rects = values, rects
+        return dirty_rects
 
-    def _draw_waypoint(self):
+    def values(self):
+        """Returns the (text, location, size, justification, color) of each value shown."""
+        return self._waypoint_values() + self._time_values() + self._speed_values() \
+            + self._fuel_values()
+
+    def _waypoint_values(self):
         current_gate = self.course_status["current_gate"]
         num_gates = self.course_status["num_gates"]
         current_proxy = self.course_status["current_proxy"]
@@ -43,50 +89,24 @@ class HUD(object):
         proxy_text = "{0:02d}/{1:02d}".format(current_proxy, num_proxies) \
             if num_proxies > 0 else "--/--"
 
-        text.render_text(self.panel, self.primary_font, "Waypoints:",
-                         (0.50, self.WAYPOINT_VERTICAL_OFFSET + .04),
-                         foreground=text.BLUE, size=1.5, justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, waypoint_text,
-                         (0.50, self.WAYPOINT_VERTICAL_OFFSET + 0.14),
-                         size=2.5, justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, "Gates:",
-                         (0.25, self.WAYPOINT_VERTICAL_OFFSET + 0.22),
-                         foreground=text.BLUE, size=0.8, justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, "Proxies:",
-                         (0.75, self.WAYPOINT_VERTICAL_OFFSET + 0.22),
-                         foreground=text.BLUE, size=0.8, justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, gate_text,
-                         (0.25, self.WAYPOINT_VERTICAL_OFFSET + 0.28),
-                         size=1.2, justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, proxy_text,
-                         (0.75, self.WAYPOINT_VERTICAL_OFFSET + 0.28),
-                         size=1.2, justify=text.CENTER)
+        return [(waypoint_text, (0.50, self.WAYPOINT_VERTICAL_OFFSET + 0.14), 2.5, text.CENTER,
+                 text.WHITE),
+                (gate_text, (0.25, self.WAYPOINT_VERTICAL_OFFSET + 0.28), 1.2, text.CENTER,
+                 text.WHITE),
+                (proxy_text, (0.75, self.WAYPOINT_VERTICAL_OFFSET + 0.28), 1.2, text.CENTER,
+                 text.WHITE)]
 
-    def _draw_speed(self):
+    def _speed_values(self):
         speed_text = "{0:>05.2f}".format(self.speed)
+        return [(speed_text, (0.40, self.SPEED_VERTICAL_OFFSET + 0.16), 2.4, text.BOTTOM,
+                 text.WHITE)]
 
-        text.render_text(self.panel, self.primary_font, "Velocity:",
-                         (0.50, self.SPEED_VERTICAL_OFFSET + 0.03),
-                         foreground=text.BLUE, size=1.2, justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, speed_text,
-                         (0.40, self.SPEED_VERTICAL_OFFSET + 0.16), size=2.4, justify=text.BOTTOM)
-        text.render_text(self.panel, self.primary_font, "m/s",
-                         (0.75, self.SPEED_VERTICAL_OFFSET + 0.16), size=1.5, justify=text.BOTTOM,
-                         foreground=text.BLUE)
-
-    def _draw_fuel(self):
+    def _fuel_values(self):
         fuel_text = "{0:>05.1f}".format(self.fuel_mass)
+        return [(fuel_text, (0.40, self.FUEL_VERTICAL_OFFSET + 0.16), 2.4, text.BOTTOM,
+                 text.WHITE)]
 
-        text.render_text(self.panel, self.primary_font, "Fuel Left:",
-                         (0.50, self.FUEL_VERTICAL_OFFSET + 0.03),
-                         foreground=text.BLUE, size=1.2, justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, fuel_text,
-                         (0.40, self.FUEL_VERTICAL_OFFSET + 0.16), size=2.4, justify=text.BOTTOM)
-        text.render_text(self.panel, self.primary_font, "kg",
-                         (0.72, self.FUEL_VERTICAL_OFFSET + 0.16), size=1.5, justify=text.BOTTOM,
-                         foreground=text.BLUE)
-
-    def _draw_time(self):
+    def _time_values(self):
         time_text = self.format_time(self.timing_status["current_time"])
         if math.isnan(self.timing_status["last_split"]):
             split_text = "--:--.--"
@@ -97,16 +117,11 @@ class HUD(object):
             delta_text = self.format_time(self.timing_status["split_delta"], signed=True)
             delta_color = text.RED if self.timing_status["split_delta"] > 0 else text.GREEN
 
-        text.render_text(self.panel, self.primary_font, time_text,
-                         (0.50, self.TIME_VERTICAL_OFFSET + .06),  size=3.0, justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, "Split:",
-                         (0.45, self.TIME_VERTICAL_OFFSET + 0.17), foreground=text.BLUE, size=1.0,
-                         justify=text.CENTER)
-        text.render_text(self.panel, self.primary_font, split_text,
-                         (0.95, self.TIME_VERTICAL_OFFSET + 0.17), size=1.0, justify=text.RIGHT)
-        text.render_text(self.panel, self.primary_font, delta_text,
-                         (0.95, self.TIME_VERTICAL_OFFSET + 0.23), foreground=delta_color,
-                         size=1.0, justify=text.RIGHT)
+        return [(time_text, (0.50, self.TIME_VERTICAL_OFFSET + .06), 3.0, text.CENTER, text.WHITE),
+                (split_text, (0.95, self.TIME_VERTICAL_OFFSET + 0.17), 1.0, text.RIGHT,
+                 text.WHITE),
+                (delta_text, (0.95, self.TIME_VERTICAL_OFFSET + 0.23), 1.0, text.RIGHT,
+                 delta_color)]
 
     @staticmethod
     def format_time(time, signed=False):
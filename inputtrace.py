@@ -0,0 +1,107 @@
+import struct
+import hashlib
+
+import config
+import ship
+
+settings = config.display_settings()
+
+MAGIC = b"ZGT1"
+HEADER = struct.Struct("<4sdI")  # magic, tick size, number of ticks
+
+# Every possible ControlState, indexed by its bitmask
+CONTROL_STATES = [ship.ControlState(*[bool(mask & (1 << bit))
+                                      for bit in range(len(ship.ControlState._fields))])
+                  for mask in range(1 << len(ship.ControlState._fields))]
+
+
+def control_mask(control_state):
+    mask = 0
+    for bit, pressed in enumerate(control_state):
+        if pressed:
+            mask |= 1 << bit
+    return mask
+
+
+def _write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class InputTrace(object):
+    """Per-tick ship.ControlState of one run, stored as one bitmask byte per tick.
+
+    On disk the masks are run-length encoded: a header, followed by (mask byte, varint run length)
+    pairs. A held key costs two or three bytes however long it is held.
+    """
+
+    def __init__(self, masks=None, tick_size=None):
+        self.masks = bytearray(masks or b"")
+        self.tick_size = tick_size or settings.tick_size
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __getitem__(self, tick):
+        return CONTROL_STATES[self.masks[tick]]
+
+    def append(self, control_state, num_ticks=1):
+        self.masks += bytes([control_mask(control_state)]) * num_ticks
+
+    @property
+    def runs(self):
+        runs = []
+        for mask in self.masks:
+            if runs and runs[-1][0] == mask:
+                runs[-1][1] += 1
+            else:
+                runs.append([mask, 1])
+        return runs
+
+    def to_bytes(self):
+        buffer = bytearray(HEADER.pack(MAGIC, self.tick_size, len(self.masks)))
+        for mask, run_length in self.runs:
+            buffer.append(mask)
+            _write_varint(buffer, run_length)
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, tick_size, num_ticks = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise Exception("Data is not a ZeroGee input trace.")
+        masks = bytearray()
+        offset = HEADER.size
+        while offset < len(data):
+            mask = data[offset]
+            run_length, offset = _read_varint(data, offset + 1)
+            masks += bytes([mask]) * run_length
+        if len(masks) != num_ticks:
+            raise Exception("Input trace is truncated.")
+        return cls(masks, tick_size)
+
+    def save(self, filename):
+        with open(filename, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "rb") as file:
+            return cls.from_bytes(file.read())
+
+    @property
+    def digest(self):
+        return hashlib.sha256(self.to_bytes()).hexdigest()[:16]
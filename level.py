@@ -6,11 +6,11 @@ import hud
 import starfield
 import minimap
 import config
-import course
-import ship
-import waypoint
+import simulation
+import ghost
+import route
 
-settings = config.DisplaySettings()
+settings = config.display_settings()
 STATUS_READY = 0
 STATUS_SET = 1
 STATUS_GO = 2
@@ -31,44 +31,102 @@ PANEL_SIZES = {
 }
 
 panel_sizes = PANEL_SIZES[settings.screen_resolution]
+# Past this fraction of the screen, pushing the changed rects one by one costs more than pushing
+# the whole screen at once
+FULL_UPDATE_FRACTION = 0.5
 
 
 class Panel(object):
+    """A region of the screen that is only cleared and redrawn where it has been invalidated."""
+
     def __init__(self, surface, border_width=1, border_color=(200, 200, 200)):
         self.surface = surface
         self.border_width = border_width
         self.border_color = border_color
+        self.screen_rect = pygame.Rect(surface.get_abs_offset(), surface.get_size())
+        self.dirty_rects = [self.surface.get_rect()]
+
+    def invalidate(self, rect=None):
+        """Marks rect, in panel coordinates, or else the whole panel as needing a redraw. Dirty
+        rects that overlap are merged, so that no part of the panel is redrawn twice."""
+        rect = self.surface.get_rect() if rect is None else rect.clip(self.surface.get_rect())
+        if not (rect.width and rect.height):
+            return
+        overlapping = rect.collidelist(self.dirty_rects)
+        while overlapping != -1:
+            rect.union_ip(self.dirty_rects.pop(overlapping))
+            overlapping = rect.collidelist(self.dirty_rects)
+        self.dirty_rects.append(rect)
+
+    def invalidate_screen_rect(self, rect):
+        """Marks the part of the panel under rect, in screen coordinates, as needing a redraw."""
+        self.invalidate(rect.move(-self.screen_rect.left, -self.screen_rect.top))
+
+    def is_dirty(self, rect):
+        """Returns whether any of rect, in screen coordinates, has been invalidated."""
+        rect = rect.move(-self.screen_rect.left, -self.screen_rect.top)
+        return rect.collidelist(self.dirty_rects) != -1
 
     def draw(self):
-        pygame.draw.rect(self.surface, self.border_color,
-                         self.surface.get_rect(), self.border_width)
+        # Filled edges rather than pygame.draw.rect(), whose outline fills a clip rect that is
+        # only two pixels high
+        width, height = self.surface.get_size()
+        border = self.border_width
+        for edge in [(0, 0, width, border), (0, height - border, width, border),
+                     (0, 0, border, height), (width - border, 0, border, height)]:
+            self.surface.fill(self.border_color, edge)
+
+    def redraw(self, draw_contents):
+        """Clears each invalidated rect of the panel and redraws draw_contents() and then the border
+        there, clipped to that rect. Returns the screen rects that changed."""
+        if not self.dirty_rects:
+            return []
+        for rect in self.dirty_rects:
+            self.surface.set_clip(rect)
+            self.surface.fill((0, 0, 0))
+            draw_contents()
+            self.draw()
+        self.surface.set_clip(None)
+        screen_rects = [rect.move(self.screen_rect.topleft) for rect in self.dirty_rects]
+        self.dirty_rects = []
+        return screen_rects
 
 
 class Level(object):
-    def __init__(self, screen, course_dict, ship_dict, comparison_splits=None):
+    def __init__(self, screen, course_dict, ship_dict, comparison_splits=None,
+                 ghost_trajectory=None):
         self.screen = screen
-        self.start_time = pygame.time.get_ticks()
-        self.current_time = 0
         self.status = STATUS_READY
         
         self.main_panel = Panel(screen.subsurface(pygame.Rect(*panel_sizes["main_rect"])))
         self.hud_panel = Panel(screen.subsurface(pygame.Rect(*panel_sizes["hud_rect"])))
         self.minimap_panel = Panel(screen.subsurface(pygame.Rect(*panel_sizes["minimap_rect"])))
         
-        self.ship = ship.ship_from_dict(ship_dict, self.main_panel.surface)
-        self.ship.set_position((-0.1, 0), 0)
-        self.course = course.Course(self.main_panel.surface, course_dict)
-        self.active_splits = waypoint.Splits(self.course.num_waypoints)
+        self.simulation = simulation.Simulation(course_dict, ship_dict,
+                                                simulation.keyboard_controls,
+                                                self.main_panel.surface)
+        self.ship = self.simulation.ship
+        self.course = self.simulation.course
+        self.active_splits = self.simulation.splits
         self.comparison_splits = comparison_splits if comparison_splits else self.active_splits
+        self.ghost = ghost.GhostSprite(self.main_panel.surface, ship_dict["ship_class"],
+                                       ghost_trajectory) if ghost_trajectory else None
 
         self.starfield = starfield.Starfield(self.main_panel.surface)
         self.level_splash = LevelSplash(self.screen, "Ready", (255, 0, 255), 10000)
 
         self.hud = hud.HUD(self.hud_panel.surface)
-        self.minimap = minimap.MiniMap(self.minimap_panel.surface, self.course, self.ship)
+        suggested_route = route.plan_route(self.course, self.ship) if self.course.proxies \
+            else None
+        self.minimap = minimap.MiniMap(self.minimap_panel.surface, self.course, self.ship,
+                                       suggested_route)
         self.camera_position = self.ship.camera_position
+        self.previous_camera_position = self.camera_position
+        self.drawn_view = None
+        self.drawn_splash = None
     
     def update(self):
+        self.previous_camera_position = self.camera_position
         self.level_splash.update()
         if self.status is STATUS_READY:
             self._update_ready()
@@ -89,7 +147,6 @@ class Level(object):
         pressed_keys = pygame.key.get_pressed()
         if self.level_splash.finished:
             self.status = STATUS_GO
-            self.start_time = pygame.time.get_ticks()
             self.level_splash = LevelSplash(self.screen, "Go!", (255, 0, 255), 1.5)
         elif pressed_keys[pygame.K_UP] or pressed_keys[pygame.K_LEFT] or \
                 pressed_keys[pygame.K_RIGHT]:
@@ -99,19 +156,21 @@ class Level(object):
             self.active_splits.status = "Disqualified"
     
     def _update_go(self):
-        if self.course.finish_box.timer == 0:
-            self.current_time = (pygame.time.get_ticks() - self.start_time) / 1000
-
-        external_acceleration = self.course.acceleration(self.ship.position)
-        self.ship.update(external_acceleration)
+        self.simulation.step()
         self.camera_position = self.ship.camera_position
-        self.course.update(self.ship.position)
-        self.active_splits.update(self.current_time, self.course.waypoints_completed)
+        self.minimap.update()
 
-        if self.course.finish_box.finished:
+        if self.simulation.finished:
             self.status = STATUS_FINISHED
             self.level_splash = LevelSplash(self.screen, "Finished", (255,  0, 255), 5)
-            self.active_splits.set_final_time(self.current_time)
+
+    @property
+    def current_time(self):
+        return self.simulation.current_time
+
+    @property
+    def input_trace(self):
+        return self.simulation.input_trace
 
     @property
     def timing_status(self):
@@ -123,18 +182,65 @@ class Level(object):
                 "last_split": last_split,
                 "split_delta": split_delta}
     
-    def draw(self):
-        self.screen.fill((0, 0, 0))
-        self.main_panel.draw()
-        self.hud_panel.draw()
-        self.minimap_panel.draw()
-        self.hud.draw()
-        self.minimap.draw()
-        self.course.draw(self.camera_position)
-        self.ship.draw(self.camera_position)
-        self.starfield.draw(self.camera_position)
-        if not self.level_splash.finished:
+    def draw(self, alpha=1.0):
+        """Redraws whatever has changed since the last frame, alpha of the way between the
+        previous tick and the current one, and returns the rects of the screen it drew on, or the
+        whole screen if they cover most of it."""
+        if self.status is not STATUS_GO:
+            # Nothing moves between ticks unless the race is running
+            alpha = 1.0
+        camera_position = self.previous_camera_position.lerp(self.camera_position, alpha)
+        view = self.simulation.ticks, tuple(camera_position)
+        if self.status is STATUS_GO or view != self.drawn_view:
+            self.main_panel.invalidate()
+        self.drawn_view = view
+        for rect in self.hud.dirty_rects():
+            self.hud_panel.invalidate(rect)
+        for rect in self.minimap.dirty_rects():
+            self.minimap_panel.invalidate(rect)
+        draw_splash = self._invalidate_splash()
+
+        dirty_rects = (self.main_panel.redraw(lambda: self._draw_main_view(camera_position, alpha))
+                       + self.hud_panel.redraw(self.hud.draw)
+                       + self.minimap_panel.redraw(self.minimap.draw))
+        if draw_splash:
             self.level_splash.draw()
+            dirty_rects.append(self.level_splash.rect)
+        screen_width, screen_height = self.screen.get_size()
+        if sum(rect.width * rect.height for rect in dirty_rects) \
+                > FULL_UPDATE_FRACTION * screen_width * screen_height:
+            return [self.screen.get_rect()]
+        return dirty_rects
+
+    def _draw_main_view(self, camera_position, alpha):
+        self.course.draw(camera_position)
+        if self.ghost:
+            self.ghost.draw(camera_position, self.simulation.ticks, alpha)
+        self.ship.draw(camera_position, alpha)
+        self.starfield.draw(camera_position)
+
+    def _invalidate_splash(self):
+        """The splash text is drawn over the panels, so whatever is under it must be redrawn when
+        it appears, disappears, or has anything beneath it redrawn; returns whether it must then
+        be drawn again."""
+        splash = None if self.level_splash.finished else self.level_splash
+        if splash is not self.drawn_splash:
+            if self.drawn_splash:
+                self._invalidate_screen_rect(self.drawn_splash.rect)
+            self.drawn_splash = splash
+        elif not (splash and any(panel.is_dirty(splash.rect) for panel in self.panels)):
+            return False
+        if splash:
+            self._invalidate_screen_rect(splash.rect)
+        return splash is not None
+
+    def _invalidate_screen_rect(self, rect):
+        for panel in self.panels:
+            panel.invalidate_screen_rect(rect)
+
+    @property
+    def panels(self):
+        return [self.main_panel, self.hud_panel, self.minimap_panel]
 
 
 class LevelSplash(object):
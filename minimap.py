@@ -1,3 +1,5 @@
+import collections
+
 import pygame
 from pygame.math import Vector2
 
@@ -9,20 +11,43 @@ class MiniMap(object):
     FINISH_BOX_COLOR = (200, 100, 200)
     GRAVITY_ZONE_COLOR = (50, 100, 50)
     SHIP_COLOR = (100, 100, 255)
+    ROUTE_COLOR = (90, 90, 90)
+    TRAIL_COLOR = (50, 50, 130)
     PROXY_RADIUS = 1
     GATE_RADIUS = 2
     SHIP_RADIUS = 3
     FINISH_BOX_SIZE = 4
+    # When the ship leaves the course, the map zooms out to include it plus this fraction of the
+    # course's size, so that the course layer is only re-rendered every so often
+    INFLATE_MARGIN = 0.25
+    TRAIL_LENGTH = 250   # positions kept for the trail
+    TRAIL_INTERVAL = 5   # ticks between trail positions
+    # Past this many trail positions added between frames, the whole map is redrawn rather than
+    # each segment of the trail that changed
+    MAX_TRAIL_CHANGES = 10
 
-    def __init__(self, panel, course, ship):
+    def __init__(self, panel, course, ship, route=None, trail_length=TRAIL_LENGTH):
         self.panel = panel
         self.course = course
         self.ship = ship
+        self.route = route
+        self.trail = collections.deque(maxlen=trail_length)
+        self.trail_positions_added = 0
+        # Positions that fell off the tail of the trail since the last call to dirty_rects()
+        self.trail_dropped = collections.deque(maxlen=self.MAX_TRAIL_CHANGES)
+        self.ticks = 0
         self.finish_box_size = Vector2(self.FINISH_BOX_SIZE, self.FINISH_BOX_SIZE)
         self.bounding_rect = self.course.bounding_rect
         self.default_origin, self.default_meters_per_pixel = \
             self.translation_factors(self.bounding_rect)
         self.origin, self.meters_per_pixel = self.default_origin, self.default_meters_per_pixel
+        self.view_rect = self.bounding_rect
+        self.drawn_view = None
+        self.course_layer = pygame.Surface(self.panel.get_size()).convert()
+        self.course_layer_key = None
+        self.map_layer = pygame.Surface(self.panel.get_size()).convert()
+        self.map_layer_key = None
+        self.next_route_position = None
 
     def translation_factors(self, bounding_rect):
         width, height = bounding_rect.size
@@ -33,29 +58,134 @@ class MiniMap(object):
         origin = center - panel_size / 2 * meters_per_pixel
         return origin, meters_per_pixel
 
-    def inflate_bounding_box(self, ship_position):
+    def inflate_bounding_box(self, ship_position, margin=0):
+        """Returns the course's bounding rect stretched to include ship_position, and margin
+        beyond it."""
         rect = self.bounding_rect
         if ship_position.x < rect.left:
-            rect = pygame.Rect(ship_position.x, rect.top, rect.right - ship_position.x, rect.height)
+            left = ship_position.x - margin
+            rect = pygame.Rect(left, rect.top, rect.right - left, rect.height)
         elif ship_position.x > rect.right:
-            rect = pygame.Rect(rect.left, rect.top, ship_position.x - rect.left, rect.height)
+            rect = pygame.Rect(rect.left, rect.top, ship_position.x + margin - rect.left,
+                               rect.height)
         if ship_position.y < rect.top:
-            rect = pygame.Rect(rect.left, ship_position.y, rect.width,
-                               rect.bottom - ship_position.y)
+            top = ship_position.y - margin
+            rect = pygame.Rect(rect.left, top, rect.width, rect.bottom - top)
         elif ship_position.y > rect.bottom:
-            rect = pygame.Rect(rect.left, rect.top, rect.width, ship_position.y - rect.top)
+            rect = pygame.Rect(rect.left, rect.top, rect.width,
+                               ship_position.y + margin - rect.top)
         return rect
 
     def set_translation_factors(self):
         if self.bounding_rect.collidepoint(*self.ship.position):
-            self.origin = self.default_origin
-            self.meters_per_pixel = self.default_meters_per_pixel
+            view_rect = self.bounding_rect
+        elif self.view_rect.collidepoint(*self.ship.position):
+            view_rect = self.view_rect
+        else:
+            margin = self.INFLATE_MARGIN * max(self.bounding_rect.size)
+            view_rect = self.inflate_bounding_box(self.ship.position, margin)
+        if view_rect == self.view_rect:
+            return
+        self.view_rect = view_rect
+        if view_rect == self.bounding_rect:
+            self.origin, self.meters_per_pixel = self.default_origin, self.default_meters_per_pixel
         else:
-            bounding_box = self.inflate_bounding_box(self.ship.position)
-            self.origin, self.meters_per_pixel = self.translation_factors(bounding_box)
+            self.origin, self.meters_per_pixel = self.translation_factors(view_rect)
+
+    def update(self):
+        """Records the ship's position in the trail every TRAIL_INTERVAL ticks."""
+        if self.ticks % self.TRAIL_INTERVAL == 0:
+            if len(self.trail) == self.trail.maxlen:
+                self.trail_dropped.append(self.trail[0])
+            self.trail.append(Vector2(self.ship.position))
+            self.trail_positions_added += 1
+        self.ticks += 1
+
+    def dirty_rects(self):
+        """Returns the whole panel if the scale or the route has changed since the last call, and
+        otherwise the rects around what moved: the ship, the leg of the route from it and the
+        segments of the trail added at its head or dropped from its tail."""
+        self.set_translation_factors()
+        layer_key = (tuple(self.origin), self.meters_per_pixel, self.course.waypoints_completed)
+        ship_pixels = self._position_to_pixels(self.ship.position)
+        trail_dropped = list(self.trail_dropped)
+        self.trail_dropped.clear()
+        drawn_view, self.drawn_view = \
+            self.drawn_view, (layer_key, ship_pixels, self.trail_positions_added)
+        if drawn_view is None or drawn_view[0] != layer_key:
+            return [self.panel.get_rect()]
+        _, drawn_ship_pixels, drawn_positions_added = drawn_view
+        num_added = self.trail_positions_added - drawn_positions_added
+        if num_added > self.MAX_TRAIL_CHANGES:
+            return [self.panel.get_rect()]
+
+        rects = []
+        if ship_pixels != drawn_ship_pixels:
+            rects += [self._ship_rect(drawn_ship_pixels), self._ship_rect(ship_pixels)]
+            if self.next_route_position:
+                route_pixels = self._position_to_pixels(self.next_route_position)
+                rects += [self._line_rect(drawn_ship_pixels, route_pixels),
+                          self._line_rect(ship_pixels, route_pixels)]
+        if num_added:
+            added = [self.trail[i] for i in range(-min(num_added + 1, len(self.trail)), 0)]
+            rects += self._segment_rects(added)
+        if trail_dropped:
+            rects += self._segment_rects(trail_dropped + [self.trail[0]])
+        return rects
+
+    def _segment_rects(self, positions):
+        """Returns the rects covering each segment of the trail through positions."""
+        points = [self._position_to_pixels(position) for position in positions]
+        return [self._line_rect(start, end) for start, end in zip(points, points[1:])]
+
+    def _ship_rect(self, ship_pixels):
+        rect = pygame.Rect(0, 0, 2 * self.SHIP_RADIUS + 3, 2 * self.SHIP_RADIUS + 3)
+        rect.center = ship_pixels
+        return rect
+
+    @staticmethod
+    def _line_rect(start, end):
+        """Returns the rect covering a one pixel wide line from start to end, with a pixel to
+        spare on each side."""
+        left, top = min(start[0], end[0]), min(start[1], end[1])
+        return pygame.Rect(left - 1, top - 1, abs(start[0] - end[0]) + 3,
+                           abs(start[1] - end[1]) + 3)
 
     def draw(self):
+        """Blits the map of everything but the ship, re-rendering it first if any of it has
+        changed, and draws the ship over it."""
         self.set_translation_factors()
+        course_layer_key = (tuple(self.origin), self.meters_per_pixel,
+                            self.course.waypoints_completed)
+        if course_layer_key != self.course_layer_key:
+            self._render_course_layer()
+            self.course_layer_key = course_layer_key
+        map_layer_key = (course_layer_key, self._position_to_pixels(self.ship.position),
+                         self.trail_positions_added)
+        if map_layer_key != self.map_layer_key:
+            self._render_map_layer()
+            self.map_layer_key = map_layer_key
+        self.panel.blit(self.map_layer, (0, 0))
+        self._draw_ship()
+
+    def _render_map_layer(self):
+        """Draws the route leg from the ship, the course layer and the trail on the map layer.
+        Lines are drawn whole there and only ever blitted through the panel's clip rect, which
+        would otherwise shift the pixels of lines that cross it."""
+        self.map_layer.fill((0, 0, 0))
+        if self.next_route_position:
+            pygame.draw.line(self.map_layer, self.ROUTE_COLOR,
+                             self._position_to_pixels(self.ship.position),
+                             self._position_to_pixels(self.next_route_position))
+        self.map_layer.blit(self.course_layer, (0, 0))
+        self._draw_trail()
+
+    def _render_course_layer(self):
+        # Every draw call on an RLE-accelerated surface would decode and re-encode all of it
+        self.course_layer.set_colorkey(None)
+        self.course_layer.fill((0, 0, 0))
+        if self.route:
+            self._draw_route()
         for gate in self.course.gates:
             self._draw_gate(gate)
         for proxy in self.course.proxies:
@@ -63,27 +193,41 @@ class MiniMap(object):
         for zone in self.course.gravity_zones:
             self._draw_gravity_zone(zone)
         self._draw_finish_box()
-        self._draw_ship()
+        self.course_layer.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+
+    def _draw_route(self):
+        """Draws the suggested path through the stops of the route still ahead. The leg from the
+        ship to the first of them is drawn every frame."""
+        positions = self.route.remaining_positions(self.course)
+        self.next_route_position = positions[0] if positions else None
+        points = [self._position_to_pixels(position) for position in positions]
+        if len(points) > 1:
+            pygame.draw.lines(self.course_layer, self.ROUTE_COLOR, False, points)
 
     def _draw_gate(self, gate):
         position = self._position_to_pixels(gate.position)
-        pygame.draw.circle(self.panel, self.GATE_COLOR, position, self.GATE_RADIUS)
+        pygame.draw.circle(self.course_layer, self.GATE_COLOR, position, self.GATE_RADIUS)
 
     def _draw_proxy(self, proxy):
         position = self._position_to_pixels(proxy.position)
-        pygame.draw.circle(self.panel, self.PROXY_COLOR, position, self.PROXY_RADIUS)
+        pygame.draw.circle(self.course_layer, self.PROXY_COLOR, position, self.PROXY_RADIUS)
 
     def _draw_gravity_zone(self, zone):
         top_left = self._position_to_pixels(Vector2(zone.rect.topleft))
         size = Vector2(zone.rect.size) / self.meters_per_pixel
         rect = pygame.Rect(*top_left, size.x, size.y)
-        pygame.draw.rect(self.panel, self.GRAVITY_ZONE_COLOR, rect)
+        pygame.draw.rect(self.course_layer, self.GRAVITY_ZONE_COLOR, rect)
 
     def _draw_finish_box(self):
         position = self._position_to_pixels(self.course.finish_box.position)
         finish_rect = pygame.Rect(*(Vector2(position) - self.finish_box_size / 2),
                                   self.FINISH_BOX_SIZE, self.FINISH_BOX_SIZE)
-        pygame.draw.rect(self.panel, self.FINISH_BOX_COLOR, finish_rect)
+        pygame.draw.rect(self.course_layer, self.FINISH_BOX_COLOR, finish_rect)
+
+    def _draw_trail(self):
+        if len(self.trail) > 1:
+            pygame.draw.lines(self.map_layer, self.TRAIL_COLOR, False,
+                              [self._position_to_pixels(position) for position in self.trail])
 
     def _draw_ship(self):
         position = self._position_to_pixels(self.ship.position)
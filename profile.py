@@ -1,7 +1,9 @@
+import os
 import pickle
 import json
 import hashlib
 
+import inputtrace
 import waypoint
 
 
@@ -33,14 +35,39 @@ class Profile(object):
     def save(self):
         with open(self.filename_from_name(self.name), "wb") as file:
             pickle.dump(self.as_dict(), file)
-
-    def add_record(self, course_dict, ship_dict, splits):
+        for records in self.run_records.values():
+            for record in records:
+                if record.input_trace is not None:
+                    self._save_trace(record)
+
+    def _save_trace(self, record):
+        filename = self.trace_filename(self.name, record.trace_name)
+        if not os.path.exists(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            record.input_trace.save(filename)
+
+    def load_trace(self, record):
+        """Returns the InputTrace of a run, or None if it was not recorded or its trace file can't
+        be read, e.g. because the profile was copied without its traces."""
+        if record.input_trace is None and record.trace_name is not None:
+            try:
+                record.input_trace = inputtrace.InputTrace.load(
+                    self.trace_filename(self.name, record.trace_name))
+            except OSError:
+                return None
+        return record.input_trace
+
+    def add_record(self, course_dict, ship_dict, splits, input_trace=None):
         course_hash = self.dict_hash(course_dict)
         if course_hash not in self.run_records:
             self.run_records[course_hash] = []
-        self.run_records[course_hash] += [RunRecord(ship_dict, splits)]
+        self.run_records[course_hash] += [RunRecord(ship_dict, splits, input_trace=input_trace)]
 
     def fastest_run_splits(self, course_dict, ship_dict):
+        record = self.fastest_run(course_dict, ship_dict)
+        return record.splits if record else None
+
+    def fastest_run(self, course_dict, ship_dict):
         course_hash = self.dict_hash(course_dict)
         if course_hash not in self.run_records.keys():
             return None
@@ -52,32 +79,43 @@ class Profile(object):
             return None
 
         sorted_records = sorted(finish_records, key=lambda record: record.run_time)
-        return sorted_records[0].splits
+        return sorted_records[0]
 
     @staticmethod
     def filename_from_name(name):
         return "profiles/{}.p".format(name)
 
+    @staticmethod
+    def trace_filename(name, trace_name):
+        return "profiles/{}_traces/{}.zgt".format(name, trace_name)
+
     @staticmethod
     def dict_hash(dict_):
+        # Courses loaded through coursecache carry their hash
+        digest = getattr(dict_, "digest", None)
+        if digest is not None:
+            return digest
         dict_string = json.dumps(dict_, sort_keys=True).encode("utf-8")
         hash_obj = hashlib.sha256(dict_string)
         return hash_obj.digest()
 
 
 class RunRecord(object):
-    def __init__(self, ship_dict, splits):
+    def __init__(self, ship_dict, splits, trace_name=None, input_trace=None):
         self.ship_dict = ship_dict
         self.splits = splits
+        self.input_trace = input_trace
+        self.trace_name = input_trace.digest if input_trace is not None else trace_name
 
     @classmethod
     def from_dict(cls, dict_):
         splits = waypoint.Splits.from_dict(dict_["splits"])
-        return cls(dict_["ship_dict"], splits)
+        return cls(dict_["ship_dict"], splits, dict_.get("trace_name"))
 
     def as_dict(self):
         return {"ship_dict": self.ship_dict,
-                "splits": self.splits.as_dict()}
+                "splits": self.splits.as_dict(),
+                "trace_name": self.trace_name}
 
     @property
     def run_time(self):
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Plans the order in which to fly a course's proxies.
+
+Gates must be passed in sequence, but proxies may be collected at any time, so a route is the gate
+sequence with every proxy inserted somewhere along it, ending at the finish box. Each leg is costed
+by travel_time(), the time the ship needs to cover it from rest to rest. Routes with few proxies
+are solved exactly by dynamic programming over the set of proxies collected; larger ones are built
+by cheapest insertion and improved with 2-opt and Or-opt moves.
+
+Example:
+
+    python route.py levels/proxy.yaml ships/sample_pegasus.yaml
+"""
+
+import sys
+import math
+import time
+import functools
+
+from pygame.math import Vector2
+
+STOP_GATE = "gate"
+STOP_PROXY = "proxy"
+STOP_FINISH = "finish"
+
+CRUISE_SPEED = 15.0      # m/s
+EXACT_LIMIT = 300000     # largest dynamic program, in state transitions, solved exactly
+TIME_LIMIT = 0.5         # s of local search on larger routes
+NUM_NEIGHBORS = 8        # nearest stops tried as new neighbors of a moved proxy
+IMPROVEMENT_EPSILON = 1e-9
+
+
+def travel_time(distance, acceleration, cruise_speed=CRUISE_SPEED):
+    """Returns the least time to cover distance from rest to rest, accelerating and braking at
+    acceleration and moving no faster than cruise_speed."""
+    if distance * acceleration <= cruise_speed ** 2:
+        return 2 * math.sqrt(distance / acceleration)
+    return distance / cruise_speed + cruise_speed / acceleration
+
+
+def ship_acceleration(ship_):
+    main_engine = ship_.engines["main"]
+    return main_engine.full_force * main_engine.fuel_tank.efficiency / ship_.mass
+
+
+class Route(object):
+    """Planned stops of a course, each a (kind, index) pair: a gate's index in the gate sequence,
+    a proxy's index in the course's proxies, or the finish box (index None)."""
+
+    def __init__(self, stops, cost):
+        self.stops = stops
+        self.cost = cost
+
+    @staticmethod
+    def stop_position(course_, stop):
+        kind, index = stop
+        if kind == STOP_GATE:
+            return course_.gates[course_.gate_set.gate_sequence[index]].position
+        if kind == STOP_PROXY:
+            return course_.proxies[index].position
+        return course_.finish_box.position
+
+    def remaining_positions(self, course_):
+        """Returns the positions of the stops still to be flown, in order."""
+        positions = []
+        for kind, index in self.stops:
+            if kind == STOP_GATE and index < course_.gate_set.current_gate_index:
+                continue
+            if kind == STOP_PROXY and course_.proxies[index].status:
+                continue
+            positions.append(self.stop_position(course_, (kind, index)))
+        return positions
+
+
+def plan_route(course_, ship_, time_limit=TIME_LIMIT):
+    """Returns a Route through course_ for ship_, starting from the ship's current position."""
+    stops = ([(STOP_GATE, index) for index in range(course_.gate_set.num_gates)]
+             + [(STOP_PROXY, index) for index in range(course_.proxy_set.num_proxies)]
+             + [(STOP_FINISH, None)])
+    positions = [Vector2(ship_.position)] + [Route.stop_position(course_, stop) for stop in stops]
+    acceleration = ship_acceleration(ship_)
+    cost = [[travel_time(origin.distance_to(destination), acceleration)
+             for destination in positions] for origin in positions]
+
+    num_gates, num_proxies = course_.gate_set.num_gates, course_.proxy_set.num_proxies
+    if 2 ** num_proxies * (num_gates + 1) * (num_proxies + 1) ** 2 <= EXACT_LIMIT:
+        nodes = _solve_exact(cost, num_gates, num_proxies)
+    else:
+        nodes = _solve_heuristic(cost, num_gates, num_proxies, time_limit)
+    route_cost = sum(cost[a][b] for a, b in zip(nodes, nodes[1:]))
+    # Node 0 is the ship; node i is stops[i - 1]
+    return Route([stops[node - 1] for node in nodes[1:]], route_cost)
+
+
+def _solve_exact(cost, num_gates, num_proxies):
+    """Returns the cheapest node sequence, by dynamic programming over (proxies collected, gates
+    passed, last node)."""
+    first_proxy, finish = num_gates + 1, num_gates + num_proxies + 1
+    all_proxies = (1 << num_proxies) - 1
+
+    @functools.lru_cache(maxsize=None)
+    def best(collected, gates_passed, last):
+        if collected == all_proxies and gates_passed == num_gates:
+            return cost[last][finish], finish
+        options = []
+        if gates_passed < num_gates:
+            gate = gates_passed + 1
+            options.append((cost[last][gate] + best(collected, gates_passed + 1, gate)[0], gate))
+        for proxy in range(num_proxies):
+            if not collected & (1 << proxy):
+                node = first_proxy + proxy
+                options.append((cost[last][node]
+                                + best(collected | (1 << proxy), gates_passed, node)[0], node))
+        return min(options)
+
+    nodes, collected, gates_passed = [0], 0, 0
+    while nodes[-1] != finish:
+        node = best(collected, gates_passed, nodes[-1])[1]
+        if node < first_proxy:
+            gates_passed += 1
+        elif node != finish:
+            collected |= 1 << (node - first_proxy)
+        nodes.append(node)
+    return nodes
+
+
+def _solve_heuristic(cost, num_gates, num_proxies, time_limit):
+    """Returns a good node sequence: proxies inserted one by one where they add the least cost,
+    then improved by local search until no move helps or time_limit seconds have passed."""
+    deadline = time.perf_counter() + time_limit
+    first_proxy, finish = num_gates + 1, num_gates + num_proxies + 1
+    nodes = list(range(first_proxy)) + [finish]
+    for proxy in sorted(range(first_proxy, finish), key=lambda node: cost[0][node]):
+        position = min(range(len(nodes) - 1),
+                       key=lambda i: cost[nodes[i]][proxy] + cost[proxy][nodes[i + 1]]
+                       - cost[nodes[i]][nodes[i + 1]])
+        nodes.insert(position + 1, proxy)
+
+    neighbors = [sorted(range(finish + 1), key=lambda other: cost[node][other])[1:NUM_NEIGHBORS + 1]
+                 for node in range(finish + 1)]
+
+    def is_proxy(node):
+        return first_proxy <= node < finish
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = _two_opt(nodes, cost, is_proxy, deadline)
+        improved = _or_opt(nodes, cost, is_proxy, neighbors) or improved
+    return nodes
+
+
+def _two_opt(nodes, cost, is_proxy, deadline):
+    """Reverses runs of consecutive proxies wherever that shortens the route."""
+    improved = False
+    for i in range(1, len(nodes) - 1):
+        if time.perf_counter() > deadline:
+            break
+        before = nodes[i - 1]
+        j = i
+        while j < len(nodes) - 1 and is_proxy(nodes[j]):
+            after = nodes[j + 1]
+            delta = (cost[before][nodes[j]] + cost[nodes[i]][after]
+                     - cost[before][nodes[i]] - cost[nodes[j]][after])
+            if delta < -IMPROVEMENT_EPSILON:
+                nodes[i:j + 1] = reversed(nodes[i:j + 1])
+                improved = True
+            j += 1
+    return improved
+
+
+def _or_opt(nodes, cost, is_proxy, neighbors):
+    """Moves runs of up to three proxies, either way round, next to one of their nearest stops
+    wherever that shortens the route."""
+    improved = False
+    for segment_length in (1, 2, 3):
+        i = 1
+        while i + segment_length < len(nodes):
+            segment = nodes[i:i + segment_length]
+            if not all(is_proxy(node) for node in segment):
+                i += 1
+                continue
+            before, after = nodes[i - 1], nodes[i + segment_length]
+            removal_gain = (cost[before][segment[0]] + cost[segment[-1]][after]
+                            - cost[before][after])
+            rest = nodes[:i] + nodes[i + segment_length:]
+            index = {node: position for position, node in enumerate(rest)}
+            best_move = None
+            for neighbor in neighbors[segment[0]] + neighbors[segment[-1]]:
+                if neighbor not in index:
+                    continue
+                for position in (index[neighbor] - 1, index[neighbor]):
+                    if position < 0 or position + 1 >= len(rest):
+                        continue
+                    a, b = rest[position], rest[position + 1]
+                    for candidate in (segment, segment[::-1]):
+                        added = cost[a][candidate[0]] + cost[candidate[-1]][b] - cost[a][b]
+                        if added < removal_gain - IMPROVEMENT_EPSILON \
+                                and (best_move is None or added < best_move[0]):
+                            best_move = added, position, candidate
+            if best_move:
+                _, position, candidate = best_move
+                nodes[:] = rest[:position + 1] + candidate + rest[position + 1:]
+                improved = True
+            i += 1
+    return improved
+
+
+def main(argv=None):
+    import config
+    import course
+    import ship
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: route.py course.yaml ship.yaml")
+        return
+    with open(argv[0]) as course_file:
+        course_ = course.Course(None, config.load_yaml(course_file))
+    with open(argv[1]) as ship_file:
+        ship_ = ship.ship_from_dict(config.load_yaml(ship_file))
+    ship_.set_position((-0.1, 0), 0)
+
+    start = time.perf_counter()
+    route = plan_route(course_, ship_)
+    print("Planned in {0:.3f} s, estimated {1:.1f} s of flying".format(
+        time.perf_counter() - start, route.cost))
+    for kind, index in route.stops:
+        position = Route.stop_position(course_, (kind, index))
+        print("{0:<8} {1:>5} ({2:.1f}, {3:.1f})".format(kind, "" if index is None else index,
+                                                         position.x, position.y))
+
+
+if __name__ == "__main__":
+    main()
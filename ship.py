@@ -1,4 +1,5 @@
 import math
+import collections
 
 import pygame
 from pygame.math import Vector2
@@ -7,13 +8,18 @@ import config
 import propulsion
 import gfx
 
-settings = config.DisplaySettings()
-controls = config.Controls()
+settings = config.display_settings()
+controls = config.controls()
 RADIANS_TO_DEGREES = 180 / math.pi
 
 LEFT = 1
 RIGHT = -1
 
+ControlState = collections.namedtuple("ControlState", ["forward", "left", "right", "left_slew",
+                                                       "right_slew", "rotational_throttle", "nose"])
+ControlState.__new__.__defaults__ = (False,) * len(ControlState._fields)
+NO_CONTROLS = ControlState()
+
 
 def clamp(x, clamp_range):
     """Returns the value inside clamp_range that is closest to x."""
@@ -34,6 +40,31 @@ def ship_from_dict(dict_, panel=None):
         return class_object.from_dict(dict_)
 
 
+def keyboard_control_state():
+    """Reads the keyboard into a ControlState using the key bindings in config.yaml."""
+    pressed_keys = pygame.key.get_pressed()
+    return ControlState(*[bool(pressed_keys[getattr(controls, name)])
+                          for name in ControlState._fields])
+
+
+def atlas_image(atlas, angle):
+    """Returns the image of a rotation atlas nearest to angle, in degrees."""
+    return atlas[round(angle * len(atlas) / 360) % len(atlas)]
+
+
+class PhysicsSnapshot(object):
+    """Aggregate physical state of a ship, computed once per tick by Ship.update() and read by the
+    integrator and the HUD instead of recomputing the mass, force and torque properties."""
+    __slots__ = ["mass", "force", "torque", "fuel_burn", "speed"]
+
+    def __init__(self):
+        self.mass = 0
+        self.force = Vector2()
+        self.torque = 0
+        self.fuel_burn = 0
+        self.speed = 0
+
+
 class Ship(object):
     # Placeholder values. All of these should be overriden, and in fact most of these values should
     # trigger runtime errors.
@@ -54,6 +85,9 @@ class Ship(object):
         # Placeholders
         self.engines = {}
         self.fuel_tanks = {}
+        # Per-tick scratch space, reused to avoid allocating vectors in update()
+        self.snapshot_ = None
+        self.acceleration_ = Vector2()
 
     def set_position(self, position, position_angular):
         self.position = Vector2(position)
@@ -61,8 +95,13 @@ class Ship(object):
 
     @property
     def status(self):
-        speed = self.velocity.length()
-        return speed, self.fuel_tanks["primary"].fuel_mass
+        return self.snapshot.speed, self.fuel_tanks["primary"].fuel_mass
+
+    @property
+    def snapshot(self):
+        if self.snapshot_ is None:
+            self._update_snapshot(0).speed = self.velocity.length()
+        return self.snapshot_
 
     @property
     def mass(self):
@@ -94,45 +133,146 @@ class Ship(object):
                                  outboard_meters=thruster_position,
                                  throttle_ratio=self.rotational_throttle_ratio)
 
-    def update(self, external_acceleration):
-        self._handle_keyboard_input()
+    def update(self, external_acceleration, control_state=None):
+        """Advances the ship by one tick. If no control_state is given, the keyboard is polled."""
+        if control_state is None:
+            control_state = keyboard_control_state()
+        self._handle_input(control_state)
+        snapshot = self._update_snapshot(self._burn_fuel())
 
-        acceleration_angular = (self.torque / (self.mass * self.rotational_inertia_factor)
+        acceleration_angular = (snapshot.torque / (snapshot.mass * self.rotational_inertia_factor)
                                 * settings.tick_size * RADIANS_TO_DEGREES)
         self.velocity_angular += acceleration_angular
         self.position_angular += self.velocity_angular * settings.tick_size
 
-        internal_acceleration = self.force / self.mass * settings.tick_size
-        internal_acceleration.rotate_ip(-self.position_angular)
-        acceleration = external_acceleration + internal_acceleration
+        acceleration = self.acceleration_
+        acceleration.update(snapshot.force.x / snapshot.mass * settings.tick_size,
+                            snapshot.force.y / snapshot.mass * settings.tick_size)
+        acceleration.rotate_ip(-self.position_angular)
+        acceleration += external_acceleration
         self.velocity += acceleration
-        self.position += self.velocity * settings.tick_size
+        self.position.x += self.velocity.x * settings.tick_size
+        self.position.y += self.velocity.y * settings.tick_size
+        snapshot.speed = self.velocity.length()
 
-    def _handle_keyboard_input(self):
-        Exception("_handle_Keyboard_input() method not implemented!")
+    @property
+    def is_coasting(self):
+        return not any(engine_.power for engine_ in self.engines.values())
+
+    def coast(self, ticks):
+        """Advances a coasting ship by ticks with no controls and no external acceleration.
+
+        The result is bit-for-bit what calling update() ticks times would give: with no thrust the
+        velocities never change, so only the position sums are repeated.
+        """
+        step_x = self.velocity.x * settings.tick_size
+        step_y = self.velocity.y * settings.tick_size
+        step_angular = self.velocity_angular * settings.tick_size
+        x, y, position_angular = self.position.x, self.position.y, self.position_angular
+        for _ in range(ticks):
+            x += step_x
+            y += step_y
+            position_angular += step_angular
+        self.position.update(x, y)
+        self.position_angular = position_angular
+        for engine_ in self.engines.values():
+            engine_.idle(ticks)
+
+    def _burn_fuel(self):
+        """Draws this tick's fuel burn of every engine from its own tank and returns the total."""
+        fuel_burn = 0
+        for tank in self.fuel_tanks.values():
+            tank_burn = 0
+            for engine_ in self.engines.values():
+                if engine_.fuel_tank is tank:
+                    tank_burn += engine_.fuel_burn
+            tank.update(tank_burn)
+            fuel_burn += tank_burn
+        return fuel_burn
+
+    def _update_snapshot(self, fuel_burn):
+        if self.snapshot_ is None:
+            self.snapshot_ = PhysicsSnapshot()
+        snapshot = self.snapshot_
+        mass = self.DRY_MASS
+        for tank in self.fuel_tanks.values():
+            mass += tank.dry_mass + tank.fuel_mass
+        force_x = force_y = torque = 0
+        for engine_ in self.engines.values():
+            if not engine_.power:
+                continue
+            thrust_factor = engine_.thrust_factor
+            efficiency = engine_.fuel_tank.efficiency
+            force_magnitude = engine_.full_force * thrust_factor * efficiency
+            force_x += force_magnitude * engine_.direction_x
+            force_y += force_magnitude * engine_.direction_y
+            torque += engine_.full_torque * thrust_factor * efficiency
+        snapshot.mass = mass
+        snapshot.force.update(force_x, force_y)
+        snapshot.torque = torque
+        snapshot.fuel_burn = fuel_burn
+        return snapshot
+
+    def _handle_input(self, control_state):
+        raise Exception("_handle_input() method not implemented!")
 
 
 class ShipSprite(Ship, gfx.LevelSprite):
     CAMERA_OFFSET_STRENGTH = 0.2
+    # Hulls pre-rendered at settings.rotation_steps angles, keyed by (image filename, alpha) and
+    # shared by every sprite of a ship class
+    rotation_atlases = {}
 
     def __init__(self, panel, image_filename, *args, **kwargs):
         super().__init__(*args, **kwargs, panel=panel)
         self.panel_center = Vector2(self.panel.get_rect().center) * settings.meters_per_pixel
-        self.image_ = self.load_image(image_filename)
+        self.atlas = self.rotation_atlas(image_filename)
+        # Pose at the start of the current tick, for interpolating between ticks when drawing
+        self.previous_position = Vector2(self.position)
+        self.previous_position_angular = self.position_angular
 
     @property
     def image(self):
-        return self.image_
+        return self.atlas[0]
 
-    def load_image(self, image_filename):
+    @classmethod
+    def load_image(cls, image_filename):
         image = pygame.image.load(image_filename).convert()
-        image = pygame.transform.rotozoom(image, -90, self.SCALE_FACTOR)
+        image = pygame.transform.rotozoom(image, -90, cls.SCALE_FACTOR)
         return image
 
+    @classmethod
+    def rotation_atlas(cls, image_filename, alpha=None):
+        """Returns the hull image rotated to each of settings.rotation_steps evenly spaced angles
+        and scaled to the display, rendering it on first use."""
+        key = image_filename, alpha
+        if key not in ShipSprite.rotation_atlases:
+            image = cls.load_image(image_filename)
+            atlas = []
+            for step in range(settings.rotation_steps):
+                rotated_image = pygame.transform.rotozoom(
+                    image, step * 360 / settings.rotation_steps, settings.scale_factor).convert()
+                rotated_image.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+                if alpha is not None:
+                    rotated_image.set_alpha(alpha)
+                atlas.append(rotated_image)
+            ShipSprite.rotation_atlases[key] = atlas
+        return ShipSprite.rotation_atlases[key]
+
     @property
     def rect(self):
         return self.image.get_rect()
 
+    def set_position(self, position, position_angular):
+        super().set_position(position, position_angular)
+        self.previous_position = Vector2(self.position)
+        self.previous_position_angular = self.position_angular
+
+    def update(self, external_acceleration, control_state=None):
+        self.previous_position.update(self.position)
+        self.previous_position_angular = self.position_angular
+        super().update(external_acceleration, control_state)
+
     @property
     def camera_position(self):
         """Camera position is the coordinate (measured in meters) of the top-left corner of the
@@ -141,7 +281,7 @@ class ShipSprite(Ship, gfx.LevelSprite):
                          math.copysign(abs(self.velocity.y ** 0.6), self.velocity.y))
         return self.position - self.panel_center + offset * self.CAMERA_OFFSET_STRENGTH
 
-    def rotational_engine(self, location, orientation):
+    def rotational_engine_sprite(self, location, orientation):
         rotational_fuel_tank = self.fuel_tanks["secondary"]  \
             if "secondary" in self.fuel_tanks.keys() else self.fuel_tanks["primary"]
         thruster_position = self.ROTATE_THRUSTER_POSITION * (1 if location.x > 0 else -1)
@@ -151,19 +291,20 @@ class ShipSprite(Ship, gfx.LevelSprite):
                                        throttle_ratio=self.rotational_throttle_ratio,
                                        offset_pixels=location, scale_factor=0.12)
 
-    def draw(self, camera_position):
-        rotated_image = pygame.transform.rotozoom(self.image, self.position_angular,
-                                                  settings.scale_factor)
-        rotated_image.set_colorkey((0, 0, 0))
-        tmp_rect = rotated_image.get_rect()
-        rotated_rect = self.rect.inflate(tmp_rect.width - self.rect.width,
-                                         tmp_rect.height - self.rect.height)
-        rotated_rect.center = (self.position - camera_position) / settings.meters_per_pixel
+    def draw(self, camera_position, alpha=1.0):
+        """Draws the ship alpha of the way from its pose at the start of the tick to its current
+        pose."""
+        position = self.previous_position.lerp(self.position, alpha)
+        position_angular = (self.previous_position_angular
+                            + (self.position_angular - self.previous_position_angular) * alpha)
+        rotated_image = atlas_image(self.atlas, position_angular)
+        rotated_rect = rotated_image.get_rect()
+        rotated_rect.center = (position - camera_position) / settings.meters_per_pixel
 
         self.panel.blit(rotated_image, rotated_rect)
         ship_center = Vector2(rotated_rect.center)
         for engine in self.engines.values():
-            engine.draw(ship_center, self.position_angular)
+            engine.draw(ship_center, position_angular)
 
 
 class Pegasus(Ship):
@@ -204,11 +345,10 @@ class Pegasus(Ship):
     def from_dict(cls, dict_):
         return cls(dict_["primary_fuel_volume"], dict_["rotational_burn_rate"])
 
-    def _handle_keyboard_input(self):
-        pressed_keys = pygame.key.get_pressed()
-        forward = pressed_keys[controls.forward]
-        left = pressed_keys[controls.left]
-        right = pressed_keys[controls.right]
+    def _handle_input(self, control_state):
+        forward = control_state.forward
+        left = control_state.left
+        right = control_state.right
 
         empty = self.fuel_tanks["primary"].is_empty
         self.engines["main"].update(forward and not empty)
@@ -216,23 +356,23 @@ class Pegasus(Ship):
         self.engines["right_aft"].update(left and not empty)
         self.engines["right_fore"].update(right and not empty)
         self.engines["left_aft"].update(right and not empty)
-        burn_mass = sum([engine_.fuel_burn for engine_ in self.engines.values()])
-        self.fuel_tanks["primary"].update(burn_mass)
 
 
 class PegasusSprite(Pegasus, ShipSprite):
+    IMAGE_FILENAME = "images/A5.png"
+
     def __init__(self, panel, *args, **kwargs):
-        super().__init__(*args, **kwargs, panel=panel, image_filename="images/A5.png")
+        super().__init__(*args, **kwargs, panel=panel, image_filename=self.IMAGE_FILENAME)
 
         # Override engine declaration to use EngineSprites instead of Engines
         self.engines = {
             "main": propulsion.EngineSprite(self.panel, fuel_rate=self.primary_burn_rate,
                                             fuel_tank=self.fuel_tanks["primary"],
                                             offset_pixels=Vector2(-35, 0), scale_factor=0.4),
-            "left_fore": self.rotational_engine(Vector2(15, 10), 90),
-            "left_aft": self.rotational_engine(Vector2(-15, 35), 90),
-            "right_fore": self.rotational_engine(Vector2(15, -10), -90),
-            "right_aft": self.rotational_engine(Vector2(-15, -35), -90)
+            "left_fore": self.rotational_engine_sprite(Vector2(15, 10), 90),
+            "left_aft": self.rotational_engine_sprite(Vector2(-15, 35), 90),
+            "right_fore": self.rotational_engine_sprite(Vector2(15, -10), -90),
+            "right_aft": self.rotational_engine_sprite(Vector2(-15, -35), -90)
         }
 
     @classmethod
@@ -297,39 +437,36 @@ class Manticore(Ship):
                    dict_["primary_fuel_tank_size"], dict_["rotational_burn_rate"],
                    dict_["rotational_throttle_ratio"])
 
-    def _handle_keyboard_input(self):
-        pressed_keys = pygame.key.get_pressed()
-        forward = pressed_keys[controls.forward]
-        left = pressed_keys[controls.left]
-        right = pressed_keys[controls.right]
-        rotational_throttle = pressed_keys[controls.rotational_throttle]
+    def _handle_input(self, control_state):
+        forward = control_state.forward
+        left = control_state.left
+        right = control_state.right
+        rotational_throttle = control_state.rotational_throttle
 
         primary_empty = self.fuel_tanks["primary"].is_empty
         self.engines["main"].update(forward and not primary_empty)
-        self.fuel_tanks["primary"].update(self.engines["main"].fuel_burn)
 
         secondary_empty = self.fuel_tanks["secondary"].is_empty
         self.engines["left_fore"].update(left and not secondary_empty, rotational_throttle)
         self.engines["right_aft"].update(left and not secondary_empty, rotational_throttle)
         self.engines["right_fore"].update(right and not secondary_empty, rotational_throttle)
         self.engines["left_aft"].update(right and not secondary_empty, rotational_throttle)
-        secondary_burn_mass = sum([engine_.fuel_burn for name, engine_ in self.engines.items()
-                                   if name != "main"])
-        self.fuel_tanks["secondary"].update(secondary_burn_mass)
 
 
 class ManticoreSprite(Manticore, ShipSprite):
+    IMAGE_FILENAME = "images/A6.png"
+
     def __init__(self, panel, *args, **kwargs):
-        super().__init__(*args, **kwargs, panel=panel, image_filename="images/A6.png")
+        super().__init__(*args, **kwargs, panel=panel, image_filename=self.IMAGE_FILENAME)
 
         self.engines = {
             "main": propulsion.EngineSprite(self.panel, fuel_rate=self.primary_burn_rate,
                                             fuel_tank=self.fuel_tanks["primary"],
                                             offset_pixels=Vector2(-45, 0), scale_factor=0.4),
-            "left_fore": self.rotational_engine(Vector2(18, 13), 90),
-            "left_aft": self.rotational_engine(Vector2(-15, 25), 90),
-            "right_fore": self.rotational_engine(Vector2(18, -13), -90),
-            "right_aft": self.rotational_engine(Vector2(-15, -25), -90)
+            "left_fore": self.rotational_engine_sprite(Vector2(18, 13), 90),
+            "left_aft": self.rotational_engine_sprite(Vector2(-15, 25), 90),
+            "right_fore": self.rotational_engine_sprite(Vector2(18, -13), -90),
+            "right_aft": self.rotational_engine_sprite(Vector2(-15, -25), -90)
         }
 
     @classmethod
@@ -389,18 +526,16 @@ class Dragon(Ship):
                    dict_["primary_fuel_type"], dict_["rotational_burn_rate"],
                    dict_["rotational_throttle_ratio"])
 
-    def _handle_keyboard_input(self):
-        pressed_keys = pygame.key.get_pressed()
-        forward = pressed_keys[controls.forward]
-        left = pressed_keys[controls.left]
-        right = pressed_keys[controls.right]
-        left_slew = pressed_keys[controls.left_slew]
-        right_slew = pressed_keys[controls.right_slew]
-        rotational_throttle = pressed_keys[controls.rotational_throttle]
+    def _handle_input(self, control_state):
+        forward = control_state.forward
+        left = control_state.left
+        right = control_state.right
+        left_slew = control_state.left_slew
+        right_slew = control_state.right_slew
+        rotational_throttle = control_state.rotational_throttle
 
         primary_empty = self.fuel_tanks["primary"].is_empty
         self.engines["main"].update(forward and not primary_empty)
-        self.fuel_tanks["primary"].update(self.engines["main"].fuel_burn)
 
         secondary_empty = self.fuel_tanks["secondary"].is_empty
         self.engines["left_fore"].update((left or left_slew) and not secondary_empty,
@@ -412,23 +547,21 @@ class Dragon(Ship):
         self.engines["left_aft"].update((right or left_slew) and not secondary_empty,
                                         rotational_throttle)
 
-        secondary_burn_mass = sum([engine_.fuel_burn for name, engine_ in self.engines.items()
-                                   if name != "main"])
-        self.fuel_tanks["secondary"].update(secondary_burn_mass)
-
 
 class DragonSprite(Dragon, ShipSprite):
+    IMAGE_FILENAME = "images/A7.png"
+
     def __init__(self, panel, *args, **kwargs):
-        super().__init__(*args, **kwargs, panel=panel, image_filename="images/A7.png")
+        super().__init__(*args, **kwargs, panel=panel, image_filename=self.IMAGE_FILENAME)
 
         self.engines = {
             "main": propulsion.EngineSprite(self.panel, fuel_rate=self.primary_burn_rate,
                                             fuel_tank=self.fuel_tanks["primary"],
                                             offset_pixels=Vector2(-45, 0), scale_factor=.4),
-            "left_fore": self.rotational_engine(Vector2(15, 26), 90),
-            "left_aft": self.rotational_engine(Vector2(-20, 32), 90),
-            "right_fore": self.rotational_engine(Vector2(15, -26), -90),
-            "right_aft": self.rotational_engine(Vector2(-20, -32), -90)
+            "left_fore": self.rotational_engine_sprite(Vector2(15, 26), 90),
+            "left_aft": self.rotational_engine_sprite(Vector2(-20, 32), 90),
+            "right_fore": self.rotational_engine_sprite(Vector2(15, -26), -90),
+            "right_aft": self.rotational_engine_sprite(Vector2(-20, -32), -90)
         }
 
     @classmethod
@@ -492,19 +625,17 @@ class Phoenix(Ship):
                    dict_["primary_fuel_type"], dict_["rotational_burn_rate"],
                    dict_["rotational_throttle_ratio"], dict_["nose_burn_rate"])
 
-    def _handle_keyboard_input(self):
-        pressed_keys = pygame.key.get_pressed()
-        forward = pressed_keys[controls.forward]
-        nose = pressed_keys[controls.nose]
-        left = pressed_keys[controls.left]
-        right = pressed_keys[controls.right]
-        left_slew = pressed_keys[controls.left_slew]
-        right_slew = pressed_keys[controls.right_slew]
-        rotational_throttle = pressed_keys[controls.rotational_throttle]
+    def _handle_input(self, control_state):
+        forward = control_state.forward
+        nose = control_state.nose
+        left = control_state.left
+        right = control_state.right
+        left_slew = control_state.left_slew
+        right_slew = control_state.right_slew
+        rotational_throttle = control_state.rotational_throttle
 
         primary_empty = self.fuel_tanks["primary"].is_empty
         self.engines["main"].update(forward and not primary_empty)
-        self.fuel_tanks["primary"].update(self.engines["main"].fuel_burn)
 
         secondary_empty = self.fuel_tanks["secondary"].is_empty
         self.engines["left_fore"].update((left or left_slew) and not secondary_empty,
@@ -517,14 +648,12 @@ class Phoenix(Ship):
                                         rotational_throttle)
         self.engines["nose"].update(nose and not secondary_empty)
 
-        secondary_burn_mass = sum([engine_.fuel_burn for name, engine_ in self.engines.items()
-                                   if name != "main"])
-        self.fuel_tanks["secondary"].update(secondary_burn_mass)
-
 
 class PhoenixSprite(Phoenix, ShipSprite):
+    IMAGE_FILENAME = "images/A10.png"
+
     def __init__(self, panel, *args, **kwargs):
-        super().__init__(*args, **kwargs, panel=panel, image_filename="images/A10.png")
+        super().__init__(*args, **kwargs, panel=panel, image_filename=self.IMAGE_FILENAME)
 
         self.engines = {
             "main": propulsion.EngineSprite(self.panel, fuel_rate=self.primary_burn_rate,
@@ -533,10 +662,10 @@ class PhoenixSprite(Phoenix, ShipSprite):
             "nose": propulsion.EngineSprite(self.panel, fuel_rate=self.nose_burn_rate,
                                             fuel_tank=self.fuel_tanks["secondary"], direction=180,
                                             offset_pixels=Vector2(40, 0), scale_factor=0.25),
-            "left_fore": self.rotational_engine(Vector2(20, 12), 90),
-            "left_aft": self.rotational_engine(Vector2(-20, 32), 90),
-            "right_fore": self.rotational_engine(Vector2(20, -12), -90),
-            "right_aft": self.rotational_engine(Vector2(-20, -32), -90)
+            "left_fore": self.rotational_engine_sprite(Vector2(20, 12), 90),
+            "left_aft": self.rotational_engine_sprite(Vector2(-20, 32), 90),
+            "right_fore": self.rotational_engine_sprite(Vector2(20, -12), -90),
+            "right_aft": self.rotational_engine_sprite(Vector2(-20, -32), -90)
         }
 
     @classmethod
@@ -0,0 +1,161 @@
+import bisect
+import math
+
+import config
+import course
+import coursecache
+import inputtrace
+import ship
+import waypoint
+
+settings = config.display_settings()
+
+
+class IdleControls(object):
+    """Control source that never fires an engine."""
+
+    def __call__(self, simulation):
+        return ship.NO_CONTROLS
+
+    def idle_ticks(self, simulation):
+        return math.inf
+
+
+idle_controls = IdleControls()
+
+
+def keyboard_controls(simulation):
+    """Control source that reads the keyboard, for races flown by a player."""
+    return ship.keyboard_control_state()
+
+
+class TraceControls(object):
+    """Control source that plays back an inputtrace.InputTrace, then idles."""
+
+    def __init__(self, input_trace):
+        if input_trace.tick_size != settings.tick_size:
+            raise Exception("Input trace was recorded with a tick size of {}, not {}."
+                            .format(input_trace.tick_size, settings.tick_size))
+        self.input_trace = input_trace
+        self.run_starts, self.run_masks = [], []
+        start = 0
+        for mask, run_length in input_trace.runs:
+            self.run_starts.append(start)
+            self.run_masks.append(mask)
+            start += run_length
+
+    def __call__(self, simulation):
+        if simulation.ticks < len(self.input_trace):
+            return self.input_trace[simulation.ticks]
+        return ship.NO_CONTROLS
+
+    def idle_ticks(self, simulation):
+        run = bisect.bisect_right(self.run_starts, simulation.ticks) - 1
+        if simulation.ticks >= len(self.input_trace) \
+                or (run == len(self.run_starts) - 1 and not self.run_masks[run]):
+            return math.inf
+        if self.run_masks[run]:
+            return 0
+        return self.run_starts[run + 1] - simulation.ticks
+
+
+class Simulation(object):
+    """Display-free race of one ship through one course.
+
+    Time is measured in simulated ticks of settings.tick_size, so a race can be stepped as fast as
+    the physics allows. Input comes from control_source, a callable that is passed the simulation
+    once per tick and returns a ship.ControlState; every state it returns is recorded in
+    input_trace. If a panel is given, the ship and course are built as sprites drawn on it.
+
+    A control source may also have an idle_ticks(simulation) method returning how many ticks from
+    now on it will give no controls at all. While those ticks last, run() and replay() skip over
+    stretches in which the ship just coasts (see coast()) instead of stepping through them.
+    """
+
+    # Coasts shorter than this are stepped through; it is also how long run() waits before trying
+    # to coast again after a failed attempt
+    MIN_COAST_TICKS = 10
+
+    def __init__(self, course_dict, ship_dict, control_source=idle_controls, panel=None):
+        self.ship = ship.ship_from_dict(ship_dict, panel)
+        self.ship.set_position((-0.1, 0), 0)
+        self.course = course.Course(panel, course_dict)
+        self.splits = waypoint.Splits(self.course.num_waypoints)
+        self.control_source = control_source
+        self.input_trace = inputtrace.InputTrace()
+        self.ticks = 0
+        self.current_time = 0
+        self.next_coast_tick = 0
+
+    @classmethod
+    def from_files(cls, course_path, ship_path, control_source=idle_controls):
+        course_dict = coursecache.load_course(course_path)
+        with open(ship_path) as ship_file:
+            ship_dict = config.load_yaml(ship_file)
+        return cls(course_dict, ship_dict, control_source)
+
+    @classmethod
+    def replay(cls, course_dict, ship_dict, input_trace, coast=True):
+        """Re-simulates a recorded run and returns the finished Simulation."""
+        simulation = cls(course_dict, ship_dict, TraceControls(input_trace))
+        while not simulation.finished and simulation.ticks < len(input_trace):
+            if not (coast and simulation.coast(len(input_trace))):
+                simulation.step()
+        return simulation
+
+    @property
+    def finished(self):
+        return self.course.finish_box.finished
+
+    def step(self):
+        if self.course.finish_box.timer == 0:
+            self.current_time = self.ticks * settings.tick_size
+
+        control_state = self.control_source(self)
+        self.input_trace.append(control_state)
+        external_acceleration = self.course.acceleration(self.ship.position)
+        self.ship.update(external_acceleration, control_state)
+        self.course.update(self.ship.position)
+        split_time = self.current_time
+        if self.course.gate_set.crossing_fraction is not None:
+            split_time += self.course.gate_set.crossing_fraction * settings.tick_size
+        self.splits.update(split_time, self.course.waypoints_completed)
+        self.ticks += 1
+
+        if self.finished:
+            self.splits.set_final_time(self.current_time)
+
+    def coast(self, max_ticks):
+        """Skips ahead, up to tick max_ticks, over ticks in which the ship's engines are off, the
+        control source gives no controls, and the ship is outside gravity zones and clear of every
+        gate, proxy and finish box it could trigger. The result is identical to stepping through
+        those ticks. Returns the number of ticks skipped, which is 0 if coasting is not possible.
+        """
+        if self.ticks < self.next_coast_tick:
+            return 0
+        idle_ticks = getattr(self.control_source, "idle_ticks", None)
+        if idle_ticks is None or not self.ship.is_coasting:
+            return 0
+        ticks = min(max_ticks - self.ticks, idle_ticks(self))
+        if ticks >= self.MIN_COAST_TICKS:
+            displacement = self.ship.velocity * settings.tick_size
+            ticks = min(ticks, self.course.coast_ticks(self.ship.position, displacement))
+        if ticks < self.MIN_COAST_TICKS:
+            self.next_coast_tick = self.ticks + self.MIN_COAST_TICKS
+            return 0
+
+        self.ship.coast(ticks)
+        self.input_trace.append(ship.NO_CONTROLS, ticks)
+        self.course.update(self.ship.position)
+        self.ticks += ticks
+        self.current_time = (self.ticks - 1) * settings.tick_size
+        return ticks
+
+    def run(self, max_time=600, coast=True):
+        """Steps until the ship finishes or max_time seconds have been simulated, and returns the
+        resulting Splits. With coast, stretches of coasting are skipped over in one go."""
+        max_ticks = int(round(max_time / settings.tick_size))
+        while not self.finished and self.ticks < max_ticks:
+            if not (coast and self.coast(max_ticks)):
+                self.step()
+        return self.splits
@@ -1,35 +1,63 @@
-import random
+import math
+
+import numpy as np
+import pygame
 
 import config
 
 
 class Starfield(object):
-    def __init__(self, panel):
-        settings = config.read_config_section(section="starfield")
+    """Background stars in parallax layers, held as arrays so that a frame places every star in a
+    handful of array operations and writes them all to the panel at once. Stars sit on whole
+    pixels, so a layer's parallax shift can be floored once and added to all of its stars."""
+
+    def __init__(self, panel, star_settings=None):
+        star_settings = star_settings or config.read_config_section(section="starfield")
         self.panel = panel
-        width, height = panel.get_size()
-        self.stars = []
+        self.width, self.height = panel.get_size()
+        x, y, colors = [], [], []
+        self.layers = []
+        start = 0
         for num_stars, parallax_rate, luminosity \
-                in zip(settings["num_stars"], settings["parallax_rate"], settings["luminosity"]):
-            self.stars += [Star(width, height, luminosity, parallax_rate)
-                           for _ in range(num_stars)]
-
-    def draw(self, camera_position):
-        for star in self.stars:
-            star.draw(camera_position, self.panel)
-
+                in zip(star_settings["num_stars"], star_settings["parallax_rate"],
+                       star_settings["luminosity"]):
+            x.append(np.random.randint(0, self.width + 1, num_stars))
+            y.append(np.random.randint(0, self.height + 1, num_stars))
+            luminosity_min, luminosity_max = luminosity // 2, min(255, luminosity * 3 // 2)
+            colors.append(np.random.triangular(luminosity_min,
+                                               (luminosity_min + luminosity_max) / 2,
+                                               luminosity_max, (num_stars, 3)).astype(int))
+            self.layers.append((slice(start, start + num_stars), parallax_rate))
+            start += num_stars
+        self.x = np.concatenate(x)
+        self.y = np.concatenate(y)
+        self.render_x = np.empty_like(self.x)
+        self.render_y = np.empty_like(self.y)
+        self.colors = self._map_colors(np.concatenate(colors))
 
-class Star(object):
-    def __init__(self, width, height, luminosity, parallax_rate):
-        self.width, self.height = width, height
-        self.x, self.y = random.randint(0, width), random.randint(0, height)
-        luminosity_max = min(255, luminosity * 3 // 2)
-        self.color = tuple([int(random.triangular(luminosity // 2, luminosity_max))
-                            for _ in range(3)])
-        self.parallax_rate = parallax_rate
+    def _map_colors(self, colors):
+        """Returns colors, an array of RGB rows, as pixel values of the panel's format."""
+        red_shift, green_shift, blue_shift, _ = self.panel.get_shifts()
+        red_loss, green_loss, blue_loss, _ = self.panel.get_losses()
+        return ((colors[:, 0] >> red_loss << red_shift)
+                | (colors[:, 1] >> green_loss << green_shift)
+                | (colors[:, 2] >> blue_loss << blue_shift)
+                | self.panel.get_masks()[3]).astype(np.uint32)
 
-    def draw(self, camera_position, panel):
+    def draw(self, camera_position):
         camera_x, camera_y = camera_position
-        render_x, render_y = (int((self.x - camera_x * self.parallax_rate) % self.width),
-                              int((self.y - camera_y * self.parallax_rate) % self.height))
-        panel.set_at((render_x, render_y), self.color)
+        for stars, parallax_rate in self.layers:
+            np.add(self.x[stars], math.floor(-camera_x * parallax_rate), out=self.render_x[stars])
+            np.add(self.y[stars], math.floor(-camera_y * parallax_rate), out=self.render_y[stars])
+        self.render_x %= self.width
+        self.render_y %= self.height
+        render_x, render_y, colors = self.render_x, self.render_y, self.colors
+        # Writing pixels directly ignores the panel's clip rect, so apply it by hand
+        clip = self.panel.get_clip()
+        if clip.size != (self.width, self.height):
+            visible = ((render_x >= clip.left) & (render_x < clip.right)
+                       & (render_y >= clip.top) & (render_y < clip.bottom))
+            render_x, render_y, colors = render_x[visible], render_y[visible], colors[visible]
+        pixels = pygame.surfarray.pixels2d(self.panel)
+        pixels[render_x, render_y] = colors
+        del pixels
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Flies a grid of ship configurations through one course on a process pool.
+
+Example:
+
+    python sweep.py levels/drag.yaml ships/sample_dragon.yaml --policy my_policies:fly \\
+        --param rotational_burn_rate=0.2:2.0:0.2 --param primary_fuel_type=Kerolox,HydroFlouro \\
+        --output results.csv
+
+Every combination of --param values is applied on top of the base ship file and raced headlessly
+with the given control policy. The policy is named as module:callable (here, a fly() function in
+my_policies.py) and is used as the simulation's control source. Alternatively, --trace replays the
+same recorded input trace (see inputtrace.py) for every configuration.
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import importlib
+import itertools
+import os
+import sys
+
+import config
+import coursecache
+import inputtrace
+import simulation
+
+RESULT_FIELDS = ["status", "finish_time", "fuel_left", "waypoints_completed", "ticks"]
+
+_worker_state = {}
+
+
+def parse_param(spec):
+    """Parses name=low:high:step (inclusive numeric range) or name=a,b,c (explicit values)."""
+    name, _, values = spec.partition("=")
+    if not name or not values:
+        raise argparse.ArgumentTypeError("Parameter {} is not of the form name=values."
+                                         .format(spec))
+    if ":" in values:
+        low, high, step = [float(value) for value in values.split(":")]
+        num_steps = int(round((high - low) / step))
+        return name, [round(low + i * step, 10) for i in range(num_steps + 1)]
+    return name, [config.load_yaml(value) for value in values.split(",")]
+
+
+def load_control_source(policy=None, trace_filename=None):
+    if trace_filename:
+        return simulation.TraceControls(inputtrace.InputTrace.load(trace_filename))
+    module_name, _, attribute = policy.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def configurations(base_ship_dict, params):
+    names = [name for name, _ in params]
+    for values in itertools.product(*[values for _, values in params]):
+        yield {**base_ship_dict, **dict(zip(names, values))}
+
+
+def _init_worker(course_dict, policy, trace_filename, max_time):
+    _worker_state["course_dict"] = course_dict
+    _worker_state["control_source"] = load_control_source(policy, trace_filename)
+    _worker_state["max_time"] = max_time
+
+
+def evaluate(ship_dict):
+    simulation_ = simulation.Simulation(_worker_state["course_dict"], ship_dict,
+                                        _worker_state["control_source"])
+    splits = simulation_.run(_worker_state["max_time"])
+    fuel_left = sum(tank.fuel_mass for tank in simulation_.ship.fuel_tanks.values())
+    return {"status": splits.status,
+            "finish_time": splits.final_time,
+            "fuel_left": fuel_left,
+            "waypoints_completed": simulation_.course.waypoints_completed,
+            "ticks": simulation_.ticks}
+
+
+def run_sweep(course_dict, base_ship_dict, params, policy=None, trace_filename=None, max_time=600,
+              jobs=None):
+    """Returns a list of (ship_dict, result) pairs, one per configuration, in grid order. Ships are
+    flown by the policy (module:callable) or by replaying the input trace in trace_filename."""
+    ship_dicts = list(configurations(base_ship_dict, params))
+    jobs = jobs or os.cpu_count()
+    chunksize = max(1, len(ship_dicts) // (4 * jobs))
+    with concurrent.futures.ProcessPoolExecutor(
+            jobs, initializer=_init_worker,
+            initargs=(course_dict, policy, trace_filename, max_time)) as executor:
+        results = list(executor.map(evaluate, ship_dicts, chunksize=chunksize))
+    return list(zip(ship_dicts, results))
+
+
+def write_results(file, param_names, results):
+    writer = csv.writer(file)
+    writer.writerow(param_names + RESULT_FIELDS)
+    for ship_dict, result in results:
+        writer.writerow([ship_dict[name] for name in param_names]
+                        + [result[field] for field in RESULT_FIELDS])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep ship configurations over a course.")
+    parser.add_argument("course", help="course YAML file")
+    parser.add_argument("ship", help="base ship YAML file; its ship_class is swept")
+    control_group = parser.add_mutually_exclusive_group(required=True)
+    control_group.add_argument("--policy", help="control source, as module:callable")
+    control_group.add_argument("--trace", help="input trace file to replay")
+    parser.add_argument("--param", action="append", type=parse_param, default=[],
+                        help="name=low:high:step or name=a,b,c; may be repeated")
+    parser.add_argument("--max-time", type=float, default=600,
+                        help="simulated seconds before a run is abandoned")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--output", help="CSV results file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    course_dict = coursecache.load_course(args.course)
+    with open(args.ship) as ship_file:
+        base_ship_dict = config.load_yaml(ship_file)
+
+    results = run_sweep(course_dict, base_ship_dict, args.param, args.policy, args.trace,
+                        args.max_time, args.jobs)
+    param_names = [name for name, _ in args.param]
+    if args.output:
+        with open(args.output, "w", newline="") as output_file:
+            write_results(output_file, param_names, results)
+    else:
+        write_results(sys.stdout, param_names, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
+import functools
+
 import pygame
 
 import config
 
-settings = config.DisplaySettings()
+settings = config.display_settings()
 
 FONT_SIZE_LOOKUP = {
     (1360, 768): 24,
@@ -24,20 +26,40 @@ BLUE = (0, 0, 255)
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 
+MAX_CACHED_TEXTS = 1024
+
 
 def render_text(surface, font, text, location, foreground=WHITE, background=BLACK,
                 size=1, justify=TOP_LEFT):
-    size_px = reference_font_size * size
-    surface_size = surface.get_size()
-    location_px = (location[0] * surface_size[0],
-                   location[1] * surface_size[1])
+    """Blits text onto surface at location, a fraction of the surface's size, and returns the
+    rect it covers."""
+    text_surface = text_image(font, text, tuple(foreground), tuple(background), size)
+    return surface.blit(text_surface, _text_position(surface, text_surface, location, justify))
+
+
+def text_rect(surface, font, text, location, foreground=WHITE, background=BLACK,
+              size=1, justify=TOP_LEFT):
+    """Returns the rect render_text() would cover with the same arguments, without drawing."""
+    text_surface = text_image(font, text, tuple(foreground), tuple(background), size)
+    return pygame.Rect(_text_position(surface, text_surface, location, justify),
+                       text_surface.get_size())
 
+
+def _text_position(surface, text_surface, location, justify):
+    surface_width, surface_height = surface.get_size()
+    text_width, text_height = text_surface.get_size()
+    return (location[0] * surface_width - text_width * justify[0],
+            location[1] * surface_height - text_height * justify[1])
+
+
+@functools.lru_cache(maxsize=MAX_CACHED_TEXTS)
+def text_image(font, text, foreground, background, size):
+    """Returns text rasterized in font. Rendered texts are cached, so they must not be drawn on."""
+    size_px = reference_font_size * size
+    # Padding the text with slashes keeps its baseline and height the same whatever it contains
     pad_width = font.get_rect("/", size=size_px).width
     raw_surface, raw_rect = font.render("/" + text + "/", foreground, background, size=size_px)
-    text_surface = raw_surface.subsurface(pygame.Rect(pad_width, 0,
-                                                      raw_rect.width - 2 * pad_width,
-                                                      raw_rect.height))
-    text_rect = text_surface.get_rect()
-    location_offset = (text_rect.width * justify[0], text_rect.height * justify[1])
-    location_px = (location_px[0] - location_offset[0], location_px[1] - location_offset[1])
-    surface.blit(text_surface, location_px)
+    # The text is opaque, so converting it drops the alpha channel freetype renders with and
+    # makes blitting it a plain copy
+    return raw_surface.subsurface(pygame.Rect(pad_width, 0, raw_rect.width - 2 * pad_width,
+                                              raw_rect.height)).convert()
@@ -1,12 +1,12 @@
 import math
 
-import pygame
 from pygame.math import Vector2
 
 import gfx
+import assets
 import config
 
-settings = config.DisplaySettings()
+settings = config.display_settings()
 
 
 class Gate(object):
@@ -21,46 +21,61 @@ class Gate(object):
         self.position = Vector2(position)
         self.angular_position = angular_position
         self.status = status
+        # The gate frame is the world rotated by angular_position; the gate line is x = frame_x
+        self.cos, self.sin = Vector2(1, 0).rotate(angular_position)
+        self.frame_x, self.frame_y = self.frame_coordinates(self.position)
         self.last_side = 0
+        self.last_offset = 0
+        self.crossing_fraction = None
 
     @classmethod
     def from_dict(cls, dict_):
         return cls(dict_["position"], dict_["angle"])
 
+    def frame_coordinates(self, position):
+        """Returns position rotated into the gate frame; the same as position.rotate()."""
+        x, y = position[0], position[1]
+        return x * self.cos - y * self.sin, x * self.sin + y * self.cos
+
     def update(self, ship_position):
-        ship_position_rotated = ship_position.rotate(self.angular_position)
-        gate_position_rotated = self.position.rotate(self.angular_position)
-        current_side = ship_position_rotated.x - gate_position_rotated.x
-        distance_from_center = abs(ship_position_rotated.y - gate_position_rotated.y)
-        switched_sides = (current_side * self.last_side) < 0
-        status_updated = (self.status == self.STATUS_NEXT
-                          and distance_from_center < self.MINIMUM_DISTANCE_FROM_CENTER
-                          and switched_sides)
+        """Returns True if the ship has just passed through the gate. The ship is taken to move in
+        a straight line since the last update, so a pass is judged where that segment meets the
+        gate line, however far the ship moved. crossing_fraction is then the fraction of the tick
+        at which the ship crossed."""
+        ship_x, ship_y = self.frame_coordinates(ship_position)
+        current_side = ship_x - self.frame_x
+        current_offset = ship_y - self.frame_y
+        status_updated = False
+        self.crossing_fraction = None
+        if self.status == self.STATUS_NEXT and (current_side * self.last_side) < 0:
+            fraction = self.last_side / (self.last_side - current_side)
+            crossing_offset = self.last_offset + fraction * (current_offset - self.last_offset)
+            if abs(crossing_offset) < self.MINIMUM_DISTANCE_FROM_CENTER:
+                status_updated = True
+                self.crossing_fraction = fraction
         self.last_side = current_side
+        self.last_offset = current_offset
         return status_updated
 
 
 class GateSprite(Gate, gfx.LevelSprite):
+    IMAGE_NAMES = ["gate-last", "gate-next", "gate-other"]
+
     def __init__(self, panel, *args, **kwargs):
         super().__init__(*args, **kwargs, panel=panel)
-        self.images = [self._load_image('gate-last'), self._load_image('gate-next'),
-                       self._load_image('gate-other')]
-        self.blit_rect = self.images[0].get_rect()
+        # Drawn at the nearest of settings.rotation_steps angles, so most gates share images
+        self.image_angle = assets.quantize_angle(self.angular_position - 90,
+                                                 settings.rotation_steps)
+        self.blit_rect = self.image.get_rect()
 
     @classmethod
     def from_dict(cls, panel, dict_):
         return cls(panel, position=dict_["position"], angular_position=dict_["angle"])
 
-    def _load_image(self, image_name):
-        image = pygame.image.load('images/' + image_name + '.png')
-        image.convert()
-        rotated_image = pygame.transform.rotozoom(image, self.angular_position - 90,
-                                                  settings.scale_factor)
-        return rotated_image
-
     @property
     def image(self):
-        return self.images[self.status]
+        return assets.image(self.IMAGE_NAMES[self.status], self.image_angle,
+                            settings.scale_factor)
 
 
 class Proxy(object):
@@ -69,19 +84,21 @@ class Proxy(object):
     DEFAULT_ACTIVATION_RADIUS = 7
 
     def __init__(self, position, status=STATUS_INACTIVE, activation_radius=None, *args, **kwargs):
-        super().__init__(self, *args, **kwargs)
+        super().__init__(*args, **kwargs)
         self.position = Vector2(position)
         self.status = status
         self.activation_radius = activation_radius or self.DEFAULT_ACTIVATION_RADIUS
 
     @classmethod
     def from_dict(cls, dict_):
-        return cls(dict_["position"], dict_.get("activation_radius"))
+        return cls(dict_["position"], activation_radius=dict_.get("activation_radius"))
 
     def update(self, ship_position):
         if self.status == self.STATUS_ACTIVE:
             return False
-        distance = (self.position - ship_position).length()
+        offset_x = self.position.x - ship_position[0]
+        offset_y = self.position.y - ship_position[1]
+        distance = math.sqrt(offset_x * offset_x + offset_y * offset_y)
         status_updated = distance < self.activation_radius
         if status_updated:
             self.status = self.STATUS_ACTIVE
@@ -89,18 +106,17 @@ class Proxy(object):
 
 
 class ProxySprite(Proxy, gfx.LevelSprite):
+    IMAGE_NAMES = ["proxy-inactive", "proxy-active"]
+
     def __init__(self, panel, *args, **kwargs):
         super().__init__(*args, **kwargs, panel=panel)
-        self.images = [self._load_image('proxy-inactive'), self._load_image('proxy-active')]
-        self.blit_rect = self.images[0].get_rect()
-
-    def _load_image(self, image_name):
-        image = pygame.image.load('images/' + image_name + '.png')
-        image.convert()
-        scale = (settings.scale_factor * 0.5
-                 * self.activation_radius / self.DEFAULT_ACTIVATION_RADIUS)
-        image = pygame.transform.rotozoom(image, 0, scale)
-        return image
+        self.image_scale = (settings.scale_factor * 0.5
+                            * self.activation_radius / self.DEFAULT_ACTIVATION_RADIUS)
+        self.blit_rect = self.image.get_rect()
+
+    @property
+    def image(self):
+        return assets.image(self.IMAGE_NAMES[self.status], 0, self.image_scale)
 
     @classmethod
     def from_dict(cls, panel, dict_):
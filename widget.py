@@ -359,7 +359,7 @@ if __name__ == "__main__":
 
     import config
 
-    settings = config.DisplaySettings()
+    settings = config.display_settings()
     pygame.init()
     pygame.font.init()
     screen = pygame.display.set_mode(settings.screen_resolution, pygame.FULLSCREEN)